@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Fan-out ring cost as consumers are added (fxCommon.FanoutRing).
+
+For each consumer count, enqueues ``--orders`` orders while every consumer
+drains its cursor in batches, and reports the enqueue cost per order, the
+fetch cost per delivered order and the entries held by the ring. Orders are
+stored once, so enqueue cost and memory should not grow with consumers.
+
+    python benchmarks/bench_fanout.py [--orders N] [--consumers 1,10,100] [--batch N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxCommon import FanoutRing, PreparedOrder  # noqa: E402
+
+
+def run(n_consumers: int, orders: int, batch: int, capacity: int):
+    names = [f"acct{i}" for i in range(n_consumers)]
+    ring = FanoutRing(capacity, names)
+    order = PreparedOrder({"symbol": "XAUUSD", "order_type": "BUY", "volume": 0.01, "order_id": "x"})
+    put_time = get_time = 0.0
+    delivered = peak = 0
+    for _ in range(orders // batch):
+        t0 = time.perf_counter()
+        for _ in range(batch):
+            ring.put(order)
+        t1 = time.perf_counter()
+        peak = max(peak, ring.qsize())
+        for name in names:
+            got, _, _ = ring.get_many(name, batch)
+            delivered += len(got)
+        put_time += t1 - t0
+        get_time += time.perf_counter() - t1
+    return put_time / orders * 1e6, get_time / max(1, delivered) * 1e6, peak, ring.qsize()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--orders", type=int, default=100000)
+    ap.add_argument("--consumers", default="1,10,100")
+    ap.add_argument("--batch", type=int, default=10, help="Orders enqueued between consumer polls")
+    ap.add_argument("--capacity", type=int, default=10000)
+    args = ap.parse_args()
+
+    print(f"{args.orders} orders, polled every {args.batch}; microseconds per order")
+    print(f"{'consumers':>10}{'enqueue':>10}{'fetch':>10}{'peak held':>11}{'held after':>12}")
+    for n in (int(x) for x in args.consumers.split(",")):
+        put_us, get_us, peak, held = run(n, args.orders, args.batch, args.capacity)
+        print(f"{n:>10}{put_us:>10.2f}{get_us:>10.2f}{peak:>11}{held:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""HTTP load driver: N stub EAs polling /get_order and posting /submit_result.
+
+By default starts fxServer.py in-process on ``--port`` (its console output is
+discarded) and feeds it ``--orders`` orders through /place_order at ``--rate``
+per second (0 = as fast as the producer can post). ``--clients`` StubEA
+threads (fxEaStub.py) each keep one connection, poll, and report a fill for
+every order. The run ends when every order has a result.
+
+Reports delivered orders/s, HTTP requests/s, per-request latency and the
+place->EA latency (order accepted to an EA receiving it).
+
+    python benchmarks/bench_http.py [--clients N] [--orders N] [--rate R] [--wait-ms MS] [--batch N]
+    python benchmarks/bench_http.py --url http://host:port ...   # an already running fxServer
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxEaStub import StubEA, format_latency  # noqa: E402
+
+
+def start_local_server(port: int) -> None:
+    import fxServer
+    from fxLog import setup_logging
+    # Logging as the server runs it, into the discarded stdout
+    setup_logging(fxServer.LOG_LEVEL, fxServer.LOG_FORMAT, fxServer.ACCESS_LOG)
+    fxServer.PORT = port
+    threading.Thread(target=fxServer.start_server, daemon=True).start()
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            http.client.HTTPConnection("127.0.0.1", port, timeout=1).connect()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise SystemExit(f"server did not start on port {port}")
+
+
+def produce(host: str, port: int, count: int, rate: float, placed: dict, latency: list) -> None:
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_at = time.perf_counter()
+    for i in range(count):
+        if interval:
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        order_id = f"bench-{i}"
+        body = json.dumps({"symbol": "XAUUSD", "order_type": "BUY", "volume": 0.01, "price": 0.0,
+                           "sl": 0.0, "tp": 0.0, "order_id": order_id}).encode()
+        t0 = time.perf_counter()
+        placed[order_id] = t0
+        conn.request("POST", "/place_order", body=body, headers={"Content-Type": "application/json"})
+        conn.getresponse().read()
+        latency.append(time.perf_counter() - t0)
+    conn.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", help="Use a running fxServer instead of starting one")
+    ap.add_argument("--port", type=int, default=12390, help="Port for the in-process server")
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--orders", type=int, default=2000)
+    ap.add_argument("--rate", type=float, default=0.0, help="Orders placed per second (0 = unthrottled)")
+    ap.add_argument("--wait-ms", type=int, default=1000, help="EA long-poll wait; 0 = short polling")
+    ap.add_argument("--batch", type=int, default=1, help="Orders per EA poll via /get_orders")
+    ap.add_argument("--fill-ms", type=float, default=0.0, help="Simulated execution time per order")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    args = ap.parse_args()
+
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    placed = {}
+    delivered = []
+    place_latency = []
+    lock = threading.Lock()
+
+    def on_order(order, t_received):
+        t_placed = placed.get(order.get("order_id"))
+        if t_placed is not None:
+            with lock:
+                delivered.append(t_received - t_placed)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if not args.url:
+            start_local_server(args.port)
+        clients = [StubEA(base_url, args.wait_ms, args.batch, args.fill_ms, on_order=on_order)
+                   for _ in range(args.clients)]
+        stop = threading.Event()
+        threads = [threading.Thread(target=c.run, args=(stop,), daemon=True) for c in clients]
+        for t in threads:
+            t.start()
+        host, port = clients[0].host, clients[0].port
+        t0 = time.perf_counter()
+        producer = threading.Thread(target=produce, args=(host, port, args.orders, args.rate, placed, place_latency),
+                                    daemon=True)
+        producer.start()
+        deadline = time.time() + args.timeout
+        while sum(c.fills for c in clients) < args.orders and time.time() < deadline:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        for t in threads:
+            t.join(timeout=args.wait_ms / 1000.0 + 5)
+
+    fills = sum(c.fills for c in clients)
+    requests = len(place_latency) + sum(len(c.poll_latency) + len(c.submit_latency) for c in clients)
+    print(f"{args.clients} EAs (wait={args.wait_ms}ms, batch={args.batch}), {args.orders} orders"
+          f"{f' at {args.rate:g}/s' if args.rate else ''}: {fills} filled in {elapsed:.2f}s, "
+          f"errors={sum(c.errors for c in clients)}")
+    print(f"throughput       {fills / elapsed:,.0f} orders/s, {requests / elapsed:,.0f} requests/s")
+    print(format_latency("place_order", place_latency))
+    print(format_latency("poll", [x for c in clients for x in c.poll_latency]))
+    print(format_latency("submit_result", [x for c in clients for x in c.submit_latency]))
+    print(format_latency("place->EA", delivered))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Per-request JSON encoding cost: per-send encoding vs prepared payloads.
+
+Times what each response path spends producing its body for a typical
+fxMarketServer order (ATR mode) and a stored EA result:
+
+    stdlib      json.dumps(obj, separators=...).encode() on every request
+    backend     fxCommon.json_dumps (orjson when installed) on every request
+    prepared    PreparedOrder.raw / ResultStore.get_json, encoded once
+
+    python benchmarks/bench_json.py [--batch N] [--number N]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fxCommon import JSON_BACKEND, PreparedOrder, ResultStore, json_dumps, order_json, orders_json  # noqa: E402
+
+
+def sample_order(i: int) -> dict:
+    return {
+        "symbol": "XAUUSD", "order_type": "BUY", "volume": 0.01, "price": 0.0, "sl": 0.0, "tp": 0.0,
+        "order_id": str(1700000000000 + i), "comment": "PANDA M5 GoldScalper 2024.05.01 12:34:56",
+        "magic_number": 987654, "sl_tp_mode": "ATR", "atr_period": 14, "atr_mult_sl": 2.0,
+        "atr_mult_tp": 3.0, "timeframe": "M5", "terminal": "term1",
+    }
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--batch", type=int, default=10, help="Orders per /get_orders response")
+    ap.add_argument("--number", type=int, default=20000, help="Calls per timing run")
+    args = ap.parse_args()
+
+    order = sample_order(0)
+    prepared = PreparedOrder(order)
+    batch = [sample_order(i) for i in range(args.batch)]
+    prepared_batch = [PreparedOrder(o) for o in batch]
+    store = ResultStore()
+    store.set_result(order["order_id"], {"success": True, "ticket": 123456789, "price": 2345.67,
+                                         "sl": 2340.1, "tp": 2353.9, **order})
+    oid = order["order_id"]
+
+    def stdlib(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+    cases = [
+        ("get_order", lambda: stdlib(order), lambda: json_dumps(order), lambda: order_json(prepared)),
+        (f"get_orders x{args.batch}", lambda: stdlib(batch), lambda: json_dumps(batch),
+         lambda: orders_json(prepared_batch)),
+        ("order_status", lambda: stdlib(store.get(oid)), lambda: json_dumps(store.get(oid)),
+         lambda: store.get_json(oid)),
+    ]
+    print(f"JSON backend: {JSON_BACKEND}; microseconds per response body (best of 5 x {args.number})")
+    print(f"{'response':<16}{'stdlib':>10}{'backend':>10}{'prepared':>10}{'saved':>10}")
+    for name, base, backend, ready in cases:
+        t_base, t_backend, t_ready = (per_call_us(f, args.number) for f in (base, backend, ready))
+        print(f"{name:<16}{t_base:>10.2f}{t_backend:>10.2f}{t_ready:>10.2f}{t_base - t_ready:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Microbenchmark: signal_monitor.parse_signal lines/second, before vs after.
+
+"Before" is a frozen copy of the parser as it was prior to the fast-path
+rewrite. Both versions are first checked to return identical output for every
+line, then timed over the same pre-split lines.
+
+    python benchmarks/bench_parse_signal.py [LOG] [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import signal_monitor as sm  # noqa: E402
+
+DEFAULT_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "20250906.log")
+
+
+def legacy_parse_signal(fields: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """parse_signal before the fast-path rewrite (reference implementation)."""
+    cols = [c for c in fields]
+    if len(cols) < 3:
+        return None
+    message = cols[-1]
+    src_ctx = ""
+    if len(cols) >= 4:
+        src_ctx = cols[-2]
+    else:
+        m_comb = re.match(r"^(?P<src>.+?):\s*(?P<msg>Alert:.*)$", message)
+        if m_comb:
+            src_ctx = m_comb.group("src").strip()
+            message = m_comb.group("msg").strip()
+    log_time = ""
+    limit = -2 if len(cols) >= 4 else -1
+    scan_cols = cols[:limit] if limit != 0 else []
+    for c in scan_cols:
+        if sm.TIME_RE.match(c.strip()):
+            log_time = c.strip()
+            break
+    src_name = None
+    m = sm.SRC_CTX_RE.match(src_ctx)
+    if m:
+        src_name = m.group("src").strip()
+    else:
+        m2 = sm.SRC_CTX_COMMA_RE.match(src_ctx)
+        if m2:
+            src_name = m2.group("src").strip()
+    m = sm.ARROW_RE.match(message)
+    if m:
+        return {
+            "type": "arrow",
+            "side": m.group("side").lower(),
+            "symbol": m.group("symbol").upper(),
+            "timeframe": m.group("tf").upper(),
+            "signal_time": m.group("sig_time"),
+            "log_time": log_time,
+            "source": src_name or "",
+        }
+    m = sm.DARK_POINT_RE.match(message)
+    if m:
+        iso_date = m.group("sig_date").replace(".", "-")
+        return {
+            "type": "dark_point",
+            "side": m.group("side").lower(),
+            "symbol": m.group("symbol").upper(),
+            "timeframe": m.group("tf").upper(),
+            "signal_datetime": f"{iso_date} {m.group('sig_time')}",
+            "entry_price": float(m.group("price")),
+            "log_time": log_time,
+            "source": src_name or "",
+        }
+    return None
+
+
+# Layouts the log file itself does not exercise
+EXTRA_LINES = [
+    "0\t23:45:01.244\tDark Bands MT5 (BTCUSD,M1)\tAlert: Sell Arrow  BTCUSD M1 18:44",
+    "0\tOK\t04:10:00.966\tDark Bands BTCUSD,M5\talert: buy arrow xauusd m5 23:05",
+    "0\t04:10:00.966\tDark Bands MT5 (BTCUSD,M5): Alert: Buy Arrow  XAUUSD M5 23:05",
+    "0\t04:10:00\tALERT: Dark Point XAUUSD M5 2025.09.05 22:40 Sell Entry at: 3592.72  ",
+    "0\t04:10:00\tDark Point MT5 (XAUUSD,M5): Alert: Dark Point XAUUSD M5 2025.09.05 22:40 Buy Entry at: 1",
+    "0\t04:10:00\tAlert: Buy Arrow",
+    "0\tx",
+]
+
+
+def time_parser(fn, rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for parts in rows:
+            fn(parts)
+        best = min(best, time.perf_counter() - t0)
+    return len(rows) / best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("log", nargs="?", default=DEFAULT_LOG)
+    ap.add_argument("--repeat", type=int, default=20, help="Timed passes; the best is reported")
+    args = ap.parse_args()
+
+    lines = list(sm.iter_file_once(args.log)) + EXTRA_LINES
+    rows = [ln.split("\t") for ln in lines]
+    mismatches = [ln for ln, parts in zip(lines, rows) if sm.parse_signal(parts) != legacy_parse_signal(parts)]
+    if mismatches:
+        print(f"output differs on {len(mismatches)} lines, e.g. {mismatches[0]!r}")
+        sys.exit(1)
+    alerts = sum(1 for parts in rows if sm.parse_signal(parts))
+
+    before = time_parser(legacy_parse_signal, rows, args.repeat)
+    after = time_parser(sm.parse_signal, rows, args.repeat)
+    print(f"{args.log}: {len(rows)} lines, {alerts} alerts, outputs identical")
+    print(f"before: {before:>12,.0f} lines/s")
+    print(f"after:  {after:>12,.0f} lines/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
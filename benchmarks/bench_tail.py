@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Throughput of the tailer's read path and the parser on a synthetic log.
+
+Times, best of ``--repeat`` passes over the same file:
+
+- read:     LogReader.read_lines (decode + split) over the whole file
+- parse:    parse_signal over pre-split lines
+- pipeline: read + split + parse, as tail_log_and_enqueue does
+- scan:     scan_file, the per-file work of --backfill
+
+    python benchmarks/bench_tail.py [--lines N] [--alert-ratio R] [--log PATH] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import signal_monitor as sm  # noqa: E402
+import gen_logs  # noqa: E402
+
+
+def read_all(path: str) -> int:
+    reader = sm.open_log_reader(path, True)
+    n = 0
+    try:
+        while True:
+            lines = reader.read_lines()
+            if not lines:
+                return n
+            n += len(lines)
+    finally:
+        reader.close()
+
+
+def parse_all(rows) -> int:
+    parse = sm.parse_signal
+    n = 0
+    for parts in rows:
+        if parse(parts):
+            n += 1
+    return n
+
+
+def pipeline(path: str) -> int:
+    parse = sm.parse_signal
+    reader = sm.open_log_reader(path, True)
+    n = 0
+    try:
+        while True:
+            lines = reader.read_lines()
+            if not lines:
+                return n
+            for line in lines:
+                if parse(line.split("\t")):
+                    n += 1
+    finally:
+        reader.close()
+
+
+def best_of(repeat: int, fn, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--log", help="Existing log to use instead of a generated one")
+    ap.add_argument("--lines", type=int, default=200000)
+    ap.add_argument("--alert-ratio", type=float, default=0.01)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=5, help="Timed passes; the best is reported")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.log
+        if not path:
+            path = os.path.join(tmp, "bench.log")
+            gen_logs.write_log(path, args.lines, args.alert_ratio, args.seed)
+        size = os.path.getsize(path)
+        lines = read_all(path)
+        rows = [ln.split("\t") for ln in sm.iter_file_once(path)]
+        alerts = parse_all(rows)
+        print(f"{path if args.log else 'synthetic log'}: {lines} lines, {alerts} alerts, "
+              f"{size / 1e6:.1f} MB, best of {args.repeat}")
+
+        results = [
+            ("read", best_of(args.repeat, read_all, path), True),
+            ("parse", best_of(args.repeat, parse_all, rows), False),
+            ("pipeline", best_of(args.repeat, pipeline, path), True),
+            ("scan", best_of(args.repeat, sm.scan_file, path), True),
+        ]
+    for name, secs, io_bound in results:
+        mb = f"{size / secs / 1e6:8.1f} MB/s" if io_bound else ""
+        print(f"{name:<9} {lines / secs:>12,.0f} lines/s {mb}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Writer-to-enqueue latency of the live fxMarketServer tailer.
+
+Runs the real tail thread (tail_log_and_enqueue) on a temporary log while a
+writer appends alert lines at ``--rate`` per second, one write + flush per
+line like the terminal. Each line's latency is from just before its write to
+the matching order coming off order_queue, so it covers the watcher wakeup,
+read, decode, parse and enqueue.
+
+    python benchmarks/bench_tail_latency.py [--count N] [--rate R] [--watch auto|inotify|poll]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gen_logs  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--count", type=int, default=500, help="Alert lines to write")
+    ap.add_argument("--rate", type=float, default=100.0, help="Lines per second (0 writes back to back)")
+    ap.add_argument("--noise", type=int, default=0, help="Noise lines written before each alert")
+    ap.add_argument("--watch", default="auto", help="FX_TAIL_WATCH backend for the tailer")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "latency.log")
+    with open(path, "wb") as f:
+        f.write(b"\xff\xfe")
+    # Configure before import: fxMarketServer reads its settings at import time
+    os.environ.update({
+        "FX_LOG_PATH": path, "FX_LOG_ENCODING": "utf-16-le", "FX_TAIL_WATCH": args.watch,
+        "FX_TAIL_FROM_BEGINNING": "off", "FX_PROBE_ON_START": "off", "FX_TAIL_VIA_COMMAND": "off",
+        "FX_AUTO_ROLLOVER": "off", "FX_CHECKPOINT_PATH": "", "FX_JOURNAL_PATH": "", "FX_DEBUG": "off",
+        "FX_LOG_PATHS": "", "FX_SYMBOLS": "", "FX_DEDUP_SECS": "0",
+    })
+    import fxMarketServer as fms
+
+    rng = random.Random(args.seed)
+    sent = []
+    received = []
+
+    def consume():
+        while len(received) < args.count:
+            order = fms.order_queue.get(5.0)
+            if order is None:
+                return
+            received.append(time.monotonic())
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fms.setup_logging(fms.LOG_LEVEL, fms.LOG_FORMAT, fms.ACCESS_LOG)
+        threading.Thread(target=fms.tail_log_and_enqueue, daemon=True).start()
+        consumer = threading.Thread(target=consume, daemon=True)
+        consumer.start()
+        time.sleep(0.5)  # Let the tailer open the file and seek to its end
+        interval = 1.0 / args.rate if args.rate > 0 else 0.0
+        with open(path, "ab", buffering=0) as f:
+            next_at = time.monotonic()
+            for i in range(args.count):
+                for _ in range(args.noise):
+                    f.write((gen_logs.make_line(rng, i * 1000, False, "5col") + "\r\n").encode("utf-16-le"))
+                data = (gen_logs.make_line(rng, i * 1000, True, "5col") + "\r\n").encode("utf-16-le")
+                if interval:
+                    next_at += interval
+                    delay = next_at - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                sent.append(time.monotonic())
+                f.write(data)
+        consumer.join(timeout=10)
+
+    from fxEaStub import format_latency
+    lost = args.count - len(received)
+    print(f"{args.count} alerts at {args.rate:g}/s, watcher={args.watch}, noise={args.noise}/alert, lost={lost}")
+    print(format_latency("write->enqueue", [r - s for s, r in zip(sent, received)]))
+    try:
+        os.remove(path)
+        os.rmdir(tmp)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Generate synthetic MT5 terminal logs in the layouts of 20250906.log.
+
+Output is UTF-16-LE with a BOM and CRLF line ends, like the terminal writes.
+Most lines are indicator noise; ``--alert-ratio`` of them are Arrow or Dark
+Point alerts. The same ``--seed`` always produces the same file.
+
+    python benchmarks/gen_logs.py OUT [--lines N] [--alert-ratio R] [--seed S]
+                                      [--layout 5col|4col|3col|mixed]
+"""
+import argparse
+import random
+from typing import Iterator, List, Optional
+
+SYMBOLS = ("BTCUSD", "ETHUSD", "XAUUSD", "EURUSD", "GBPUSD", "USDJPY")
+TIMEFRAMES = ("M1", "M5", "M15", "H1")
+NOISE = (
+    "Error receiving data from the MA indicator!",
+    "Error receiving data from the ATR indicator!",
+    "Email alert error: 4510",
+    "Mobile alert error: 4517",
+)
+TAG_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+LAYOUTS = ("5col", "4col", "3col")
+
+
+def _clock(ms: int) -> str:
+    ms %= 86400000
+    return "%02d:%02d:%02d.%03d" % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000)
+
+
+def alert_message(rng: random.Random, symbol: str, tf: str, ms: int) -> str:
+    side = rng.choice(("Buy", "Sell"))
+    hhmm = _clock(ms - 5 * 3600000)[:5]  # Signals carry broker time
+    if rng.random() < 0.8:
+        return f"Alert: {side} Arrow  {symbol} {tf} {hhmm}"
+    price = round(rng.uniform(1.0, 4000.0), 2)
+    return f"Alert: Dark Point {symbol} {tf} 2025.09.05 {hhmm} {side} Entry at: {price}"
+
+
+def make_line(rng: random.Random, ms: int, alert: bool, layout: str) -> str:
+    symbol = rng.choice(SYMBOLS)
+    tf = rng.choice(TIMEFRAMES)
+    if alert:
+        message = alert_message(rng, symbol, tf, ms)
+        indicator = "Dark Point MT5" if "Dark Point" in message else "Dark Bands MT5"
+    else:
+        message = rng.choice(NOISE)
+        indicator = "Dark Bands MT5"
+    ctx = f"{indicator} ({symbol},{tf})"
+    clock = _clock(ms)
+    if layout == "5col":
+        tag = rng.choice(TAG_CHARS) + rng.choice(TAG_CHARS)
+        return f"{tag}\t0\t{clock}\t{ctx}\t{message}"
+    if layout == "4col":
+        return f"0\t{clock}\t{ctx}\t{message}"
+    return f"0\t{clock}\t{ctx}: {message}"
+
+
+def iter_lines(count: int, alert_ratio: float = 0.01, seed: int = 1, layout: str = "5col",
+               start_ms: int = 0, step_ms: Optional[float] = None) -> Iterator[str]:
+    """Yield ``count`` log lines with monotonically increasing time columns.
+
+    ``step_ms`` spaces lines evenly; by default a day is spread over them.
+    """
+    rng = random.Random(seed)
+    step = step_ms if step_ms is not None else 86400000.0 / max(1, count)
+    for i in range(count):
+        lay = rng.choice(LAYOUTS) if layout == "mixed" else layout
+        yield make_line(rng, start_ms + int(i * step), rng.random() < alert_ratio, lay)
+
+
+def encode_lines(lines: List[str]) -> bytes:
+    return ("".join(ln + "\r\n" for ln in lines)).encode("utf-16-le")
+
+
+def write_log(path: str, count: int, alert_ratio: float = 0.01, seed: int = 1,
+              layout: str = "5col", chunk: int = 10000) -> int:
+    """Write a log file; returns its size in bytes."""
+    size = 0
+    with open(path, "wb") as f:
+        f.write(b"\xff\xfe")
+        size += 2
+        batch: List[str] = []
+        for line in iter_lines(count, alert_ratio, seed, layout):
+            batch.append(line)
+            if len(batch) >= chunk:
+                data = encode_lines(batch)
+                f.write(data)
+                size += len(data)
+                batch = []
+        if batch:
+            data = encode_lines(batch)
+            f.write(data)
+            size += len(data)
+    return size
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("out")
+    ap.add_argument("--lines", type=int, default=200000)
+    ap.add_argument("--alert-ratio", type=float, default=0.01)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--layout", choices=LAYOUTS + ("mixed",), default="5col")
+    args = ap.parse_args()
+    size = write_log(args.out, args.lines, args.alert_ratio, args.seed, args.layout)
+    print(f"{args.out}: {args.lines} lines, {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
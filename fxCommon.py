@@ -0,0 +1,931 @@
+"""Shared server plumbing for fxServer.py and fxMarketServer.py."""
+import heapq
+import http.server
+import json
+import logging
+import queue
+import select
+import selectors
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+try:  # Optional faster JSON backend; output is the same compact JSON
+    import orjson
+except ImportError:
+    orjson = None
+
+http_log = logging.getLogger("fx.http")
+results_log = logging.getLogger("fx.results")
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    json_loads = orjson.loads
+
+    def json_dumps(obj: Any) -> bytes:
+        """Compact JSON encoding of ``obj`` as UTF-8 bytes."""
+        return orjson.dumps(obj)
+else:
+    JSON_BACKEND = "json"
+    json_loads = json.loads
+    _json_encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def json_dumps(obj: Any) -> bytes:
+        """Compact JSON encoding of ``obj`` as UTF-8 bytes."""
+        return _json_encoder.encode(obj).encode()
+
+
+class PreparedOrder(dict):
+    """An order dict that carries its JSON encoding, made once at enqueue.
+
+    Orders are not modified after they are queued, so responses, the stream
+    and the journal send ``raw`` instead of re-encoding the dict each time.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, order: Dict[str, Any]):
+        super().__init__(order)
+        self.raw = json_dumps(order)
+
+
+def order_json(order: Dict[str, Any]) -> bytes:
+    """JSON bytes for one order, reusing the encoding of a PreparedOrder."""
+    raw = getattr(order, "raw", None)
+    return raw if raw is not None else json_dumps(order)
+
+
+def orders_json(orders: List[Dict[str, Any]]) -> bytes:
+    """JSON array of orders, spliced from their individual encodings."""
+    return b"[" + b",".join(order_json(o) for o in orders) + b"]"
+
+
+class PooledTCPServer(socketserver.TCPServer):
+    """TCPServer that hands accepted connections to a fixed pool of workers.
+
+    The accept loop never handles a request itself, so one slow upload or
+    half-open client only ties up a single worker. Connections that arrive
+    while every worker is busy wait in a bounded backlog; beyond that they
+    are answered with 503 and closed instead of queuing without limit.
+
+    A worker is only held while a request is being handled. A connection
+    with no request waiting (after ``idle_linger`` seconds, or at once when
+    other connections are queued) is parked with one selector thread, which
+    hands it back to the pool once the client sends a request and closes it
+    after the handler's ``timeout`` seconds of silence.
+    """
+
+    allow_reuse_address = True
+    idle_linger = 0.05  # Seconds a worker waits for a quick follow-up request before parking
+
+    def __init__(self, server_address, handler_class, workers: int = 32, backlog: int = 128):
+        self.workers = max(1, int(workers))
+        self.request_queue_size = max(5, int(backlog))
+        self.rejected = 0
+        self._pending: "queue.Queue" = queue.Queue(maxsize=max(1, int(backlog)))
+        super().__init__(server_address, handler_class)
+        self._closing = False
+        self._parking: List[Tuple[Any, Any]] = []
+        self._park_lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._idle = selectors.DefaultSelector()
+        self._idle.register(self._wake_r, selectors.EVENT_READ)
+        self._idle_thread = threading.Thread(target=self._watch_idle, name="http-idle", daemon=True)
+        self._idle_thread.start()
+        self._threads = []
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"http-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def process_request(self, request, client_address):
+        self._dispatch(request, client_address)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def linger_secs(self) -> float:
+        """How long a worker may wait on an idle connection before parking it."""
+        return 0.0 if self._pending.qsize() else self.idle_linger
+
+    def _dispatch(self, request, client_address):
+        try:
+            self._pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.rejected += 1
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\n"
+                                b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def _worker(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            request, client_address = item
+            handler = None
+            try:
+                handler = self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if getattr(handler, "parked", False) and not self._closing:
+                    self._park(request, client_address)
+                else:
+                    self.shutdown_request(request)
+
+    def _park(self, request, client_address):
+        """Hand a connection with no request waiting to the idle watcher."""
+        with self._park_lock:
+            self._parking.append((request, client_address))
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass  # Wakeup already pending
+
+    def _watch_idle(self):
+        sel = self._idle
+        timeout = getattr(self.RequestHandlerClass, "timeout", None)
+        last_sweep = time.monotonic()
+        try:
+            while not self._closing:
+                for key, _ in sel.select(1.0):
+                    if key.fileobj is self._wake_r:
+                        try:
+                            self._wake_r.recv(4096)
+                        except OSError:
+                            pass
+                        continue
+                    sel.unregister(key.fileobj)
+                    self._dispatch(key.fileobj, key.data[0])
+                with self._park_lock:
+                    parking, self._parking = self._parking, []
+                now = time.monotonic()
+                for request, client_address in parking:
+                    try:
+                        sel.register(request, selectors.EVENT_READ, (client_address, now))
+                    except (ValueError, OSError):
+                        self.shutdown_request(request)  # Already closed
+                if timeout and now - last_sweep >= 1.0:
+                    last_sweep = now
+                    for key in list(sel.get_map().values()):
+                        if key.fileobj is not self._wake_r and now - key.data[1] > timeout:
+                            sel.unregister(key.fileobj)
+                            self.shutdown_request(key.fileobj)
+        finally:
+            for key in list(sel.get_map().values()):
+                if key.fileobj is not self._wake_r:
+                    self.shutdown_request(key.fileobj)
+            sel.close()
+            self._wake_r.close()
+            self._wake_w.close()
+
+    def server_close(self):
+        super().server_close()
+        self._closing = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+        for _ in self._threads:
+            try:
+                self._pending.put_nowait(None)
+            except queue.Full:
+                break
+
+
+class OrderQueue:
+    """Thread-safe priority queue of orders with optional per-order expiry.
+
+    Orders are served highest ``priority`` first and, within a priority, in
+    arrival order (newest first with ``newest_first``). An order whose
+    ``expires_at`` (Unix seconds) has passed when it reaches the head is
+    dropped instead of handed out and passed to ``on_expired`` (outside the
+    lock), so a backlog never spends EA polls on stale orders. Both keys
+    are read from the order dict; put and each pop are O(log n).
+
+    ``get_many`` removes up to N orders under one lock acquisition, so a
+    batch is never interleaved with another consumer's dequeue.
+    """
+
+    def __init__(self, newest_first: bool = False, on_expired: Optional[Callable[[List[Any]], None]] = None):
+        self.newest_first = newest_first
+        self.on_expired = on_expired
+        self.expired = 0
+        self._heap: List[Tuple[float, int, Optional[float], Any]] = []
+        self._seq = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    def put(self, order: Any) -> None:
+        priority = float(order.get("priority") or 0)
+        expires_at = order.get("expires_at")
+        with self._cond:
+            self._seq += 1
+            seq = -self._seq if self.newest_first else self._seq
+            heapq.heappush(self._heap, (-priority, seq, expires_at, order))
+            self._cond.notify()
+
+    def get(self, timeout: float = 0.0) -> Optional[Any]:
+        """Pop the next live order, waiting up to ``timeout`` seconds; None if empty."""
+        batch = self.get_many(1, timeout)
+        return batch[0] if batch else None
+
+    def get_many(self, max_items: int, timeout: float = 0.0) -> List[Any]:
+        """Pop up to ``max_items`` live orders, waiting up to ``timeout`` for the first."""
+        deadline = time.monotonic() + timeout
+        expired: List[Any] = []
+        with self._cond:
+            while True:
+                out = self._pop_live(max_items, expired)
+                remaining = deadline - time.monotonic()
+                if out or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self.expired += len(expired)
+        if expired and self.on_expired is not None:
+            self.on_expired(expired)
+        return out
+
+    def _pop_live(self, max_items: int, expired: List[Any]) -> List[Any]:
+        heap = self._heap
+        now = time.time()
+        out = []
+        while heap and len(out) < max_items:
+            _, _, expires_at, order = heapq.heappop(heap)
+            if expires_at is not None and expires_at <= now:
+                expired.append(order)
+            else:
+                out.append(order)
+        return out
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+
+class OrderStream:
+    """Bounded, sequence-numbered log of orders for push delivery with acks.
+
+    Every order gets the next sequence number; streams read everything after
+    a given number and a cumulative ``ack(seq)`` marks all orders up to it as
+    delivered, dropping them from the buffer. Unacked orders stay buffered
+    so a reconnecting client is sent them again. Beyond ``capacity`` the
+    oldest entries are dropped; unacked ones are counted in ``dropped`` and
+    passed to ``on_dropped`` (outside the lock) so they can be settled.
+
+    Numbers start from the startup time in microseconds, so they keep
+    increasing across restarts and a stale resume point never skips orders.
+    """
+
+    def __init__(self, capacity: int = 10000, on_dropped: Optional[Callable[[List[Any]], None]] = None):
+        self.capacity = max(1, int(capacity))
+        self.on_dropped = on_dropped
+        self._items: "deque[Any]" = deque()
+        self._next = time.time_ns() // 1000
+        self.acked = self._next - 1
+        self.dropped = 0
+        self._pushed = self.acked
+        self._cond = threading.Condition(threading.Lock())
+
+    def put(self, order: Any) -> int:
+        dropped = []
+        with self._cond:
+            seq = self._next
+            self._next += 1
+            self._items.append((seq, order))
+            while len(self._items) > self.capacity:
+                old_seq, old = self._items.popleft()
+                if old_seq > self.acked:
+                    dropped.append(old)
+            self.dropped += len(dropped)
+            self._cond.notify_all()
+        if dropped and self.on_dropped is not None:
+            self.on_dropped(dropped)
+        return seq
+
+    @property
+    def last_seq(self) -> int:
+        return self._next - 1
+
+    def first_seq(self) -> int:
+        """Oldest sequence number still buffered (``last_seq + 1`` if empty)."""
+        with self._cond:
+            return self._items[0][0] if self._items else self._next
+
+    def read_after(self, seq: int, max_items: int, timeout: float = 0.0) -> List[Any]:
+        """Return up to ``max_items`` (seq, order) pairs after ``seq``, waiting
+        up to ``timeout`` seconds for the first one."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._next - 1 <= seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            return self.read_items(seq, max_items)
+
+    def mark_pushed(self, seq: int) -> bool:
+        """True the first time ``seq`` (or a later number) is handed out."""
+        with self._cond:
+            if seq <= self._pushed:
+                return False
+            self._pushed = seq
+            return True
+
+    def ack(self, seq: int) -> List[Any]:
+        """Mark every order up to ``seq`` delivered; returns the newly acked orders."""
+        with self._cond:
+            return self._ack_locked(seq)
+
+    def _ack_locked(self, seq: int) -> List[Any]:
+        seq = min(seq, self._next - 1)
+        if seq <= self.acked:
+            return []
+        self.acked = seq
+        done = []
+        while self._items and self._items[0][0] <= seq:
+            done.append(self._items.popleft()[1])
+        return done
+
+    def read_items(self, seq: int, max_items: int) -> List[Any]:
+        """Up to ``max_items`` buffered (seq, order) pairs after ``seq``; the
+        caller holds the lock."""
+        items = self._items
+        start = max(0, len(items) - (self._next - 1 - seq))
+        return [items[i] for i in range(start, min(len(items), start + max_items))]
+
+    def qsize(self) -> int:
+        """Orders buffered and not yet acked."""
+        with self._cond:
+            return len(self._items)
+
+
+class FanoutRing(OrderStream):
+    """OrderStream read independently by several consumers (accounts).
+
+    Each order is stored once; every consumer only has a cursor, the last
+    sequence number it fetched, so memory and enqueue cost do not grow with
+    the number of consumers. An entry is released once every consumer has
+    read it, or trimmed when the ring is full. A consumer whose next order
+    was trimmed follows ``overflow``: "skip" resumes at the oldest order
+    still buffered, "latest" jumps to the newest order and discards the
+    rest of its backlog (stale signals are never executed late).
+    Either way the orders it missed are counted in ``missed``.
+
+    Consumers in ``consumers`` are registered up front and receive every
+    order; when that list is empty, unknown consumers register on their
+    first fetch and start with the orders enqueued after it. Otherwise an
+    unknown name raises KeyError. Orders buffered before the first
+    consumer registers can never be received; like unread orders trimmed
+    from a full ring they are counted in ``dropped`` and passed to
+    ``on_dropped``.
+    """
+
+    OVERFLOW_POLICIES = ("skip", "latest")
+
+    def __init__(self, capacity: int = 10000, consumers: List[str] = (), overflow: str = "skip",
+                 on_dropped: Optional[Callable[[List[Any]], None]] = None):
+        super().__init__(capacity, on_dropped)
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}, not {overflow!r}")
+        self.overflow = overflow
+        self.open_registration = not consumers
+        self.cursors: Dict[str, int] = {name: self.acked for name in consumers}
+        self.missed: Dict[str, int] = {name: 0 for name in consumers}
+
+    def get_many(self, consumer: str, max_items: int, timeout: float = 0.0) -> Tuple[List[Any], int, List[Any]]:
+        """Fetch up to ``max_items`` orders past ``consumer``'s cursor.
+
+        Waits up to ``timeout`` seconds for the first one. Returns the
+        orders, how many this consumer just missed through overflow, and
+        the orders now read by every consumer (released from the ring).
+        """
+        deadline = time.monotonic() + timeout
+        unreachable = []
+        try:
+            with self._cond:
+                cur = self.cursors.get(consumer)
+                if cur is None:
+                    if not self.open_registration:
+                        raise KeyError(consumer)
+                    if not self.cursors:
+                        unreachable = self._ack_locked(self._next - 1)
+                        self.dropped += len(unreachable)
+                    cur = self.cursors[consumer] = self._next - 1
+                    self.missed[consumer] = 0
+                return self._fetch_locked(consumer, cur, max_items, deadline)
+        finally:
+            if unreachable and self.on_dropped is not None:
+                self.on_dropped(unreachable)
+
+    def _fetch_locked(self, consumer: str, cur: int, max_items: int,
+                      deadline: float) -> Tuple[List[Any], int, List[Any]]:
+        while self._next - 1 <= cur:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return [], 0, []
+            self._cond.wait(remaining)
+            cur = self.cursors[consumer]  # Another poller of this consumer may have advanced it
+        missed = 0
+        first = self._items[0][0] if self._items else self._next
+        if cur + 1 < first:
+            skip_to = first - 1 if self.overflow == "skip" else self._next - 2
+            missed = skip_to - cur
+            cur = skip_to
+        batch = self.read_items(cur, max_items)
+        self.cursors[consumer] = batch[-1][0] if batch else cur
+        self.missed[consumer] += missed
+        return [order for _, order in batch], missed, self._release()
+
+    def _release(self) -> List[Any]:
+        if not self.cursors:
+            return []
+        return self._ack_locked(min(self.cursors.values()))
+
+    def lag(self) -> Dict[str, int]:
+        """Orders each consumer has yet to fetch."""
+        with self._cond:
+            return {name: self._next - 1 - cur for name, cur in self.cursors.items()}
+
+
+class OrderIdGenerator:
+    """Millisecond-timestamp order IDs that never repeat within a process.
+
+    An ID is the current Unix time in ms, or the previous ID + 1 when that
+    is not larger, so orders created in the same millisecond still get
+    distinct, increasing IDs. Clients may send IDs of the same form, so
+    ``claim_new`` skips any a client has already used.
+    """
+
+    def __init__(self):
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def new_id(self) -> str:
+        now = time.time_ns() // 1_000_000
+        with self._lock:
+            self._last = max(now, self._last + 1)
+            return str(self._last)
+
+    def claim_new(self, index: "IdempotencyIndex") -> str:
+        """A new ID successfully claimed in ``index``, never one already taken."""
+        while True:
+            order_id = self.new_id()
+            if index.claim(order_id):
+                return order_id
+
+
+class IdempotencyIndex:
+    """Bounded set of keys already accepted, for de-duplicating retries.
+
+    ``claim(key)`` is an atomic check-and-insert: True the first time a key
+    (an order ID, or a signal's identity) is seen within ``ttl`` seconds,
+    False for a repeat. Like ResultStore it keeps insertion order in an
+    OrderedDict, so size and TTL eviction are amortized O(1).
+    """
+
+    def __init__(self, max_size: int = 100000, ttl: float = 86400.0):
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self._seen: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, key: Hashable) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen
+            if self.ttl > 0:
+                while seen:
+                    oldest = next(iter(seen.values()))
+                    if now - oldest <= self.ttl:
+                        break
+                    seen.popitem(last=False)
+            if key in seen:
+                return False
+            seen[key] = now
+            if len(seen) > self.max_size:
+                seen.popitem(last=False)
+            return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._seen)
+
+
+NOT_FOUND_JSON = b'{"error":"Order not found"}'
+
+
+class PendingRecord:
+    """Status of an order that has been queued but not yet reported on.
+
+    Holds monotonic stage timestamps for latency metrics: ``origin`` (when
+    the source line was read, if known), ``created`` (enqueued) and ``sent``
+    (handed to an EA, 0.0 until then).
+    """
+
+    __slots__ = ("created", "origin", "sent")
+    JSON = b'{"status":"pending"}'
+
+    def __init__(self, created: float, origin: Optional[float] = None):
+        self.created = created
+        self.origin = created if origin is None else origin
+        self.sent = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"status": "pending"}
+
+    def as_json(self) -> bytes:
+        return self.JSON
+
+
+class ClosedRecord:
+    """Status of an order removed without being delivered: "expired" (queued
+    past its ``expires_at``) or "dropped" (trimmed from a full stream buffer).
+    """
+
+    __slots__ = ("created", "status")
+    STATUSES = ("expired", "dropped")
+
+    def __init__(self, status: str, created: float):
+        self.status = status
+        self.created = created
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"status": self.status}
+
+    def as_json(self) -> bytes:
+        return b'{"status":"%s"}' % self.status.encode()
+
+
+class ResultRecord:
+    """Compact copy of an EA execution report (the fields SendOrderResult posts).
+
+    The usual ``FIELDS`` are stored in slots; any other keys (e.g. a
+    ``retcode`` from a newer EA) are kept in ``extra``, which stays None for
+    the common report. The JSON form is encoded on the first status request
+    and reused after that.
+    """
+
+    FIELDS = ("success", "symbol", "order_type", "volume", "price", "sl", "tp",
+              "ticket", "order_id", "comment", "magic_number", "error")
+    _FIELD_SET = frozenset(FIELDS)
+    __slots__ = FIELDS + ("extra", "created", "_json")
+
+    def __init__(self, result: Dict[str, Any], created: float):
+        for name in self.FIELDS:
+            setattr(self, name, result.get(name))
+        self.extra = {k: v for k, v in result.items() if k not in self._FIELD_SET} or None
+        self.created = created
+        self._json = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = {}
+        for name in self.FIELDS:
+            val = getattr(self, name)
+            if val is not None:
+                out[name] = val
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    def as_json(self) -> bytes:
+        if self._json is None:
+            self._json = json_dumps(self.as_dict())
+        return self._json
+
+
+class ResultStore:
+    """Bounded order-status map with TTL eviction.
+
+    Records live in an OrderedDict kept in last-write order, so both the
+    oldest entry (size eviction) and expired entries (TTL eviction) sit at
+    the front and are removed in amortized O(1). Lookups stay O(1).
+    ``evicted`` and ``expired`` count records dropped for each reason; new
+    drops are also printed, at most once per ``report_secs``.
+
+    ``wait_any`` blocks a status request until one of its orders is
+    settled; storing a result, expiry or drop wakes only the requests waiting on
+    that order.
+    """
+
+    def __init__(self, max_size: int = 100000, ttl: float = 86400.0, report_secs: float = 60.0):
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self.report_secs = report_secs
+        self.evicted = 0
+        self.expired = 0
+        self._reported = (0, 0)
+        self._last_report = 0.0
+        self._records: "OrderedDict[str, Any]" = OrderedDict()
+        self._waiters: Dict[str, List[threading.Event]] = {}
+        self._lock = threading.Lock()
+
+    def add_pending(self, order_id: str, origin: Optional[float] = None) -> None:
+        self._put(order_id, PendingRecord(time.monotonic(), origin))
+
+    def mark_sent(self, order_id: str) -> Optional[PendingRecord]:
+        """Stamp a pending order as handed out; returns its record, if pending."""
+        with self._lock:
+            rec = self._records.get(order_id)
+            if not isinstance(rec, PendingRecord):
+                return None
+            rec.sent = time.monotonic()
+            return rec
+
+    def pending_record(self, order_id: str) -> Optional[PendingRecord]:
+        with self._lock:
+            rec = self._records.get(order_id)
+            return rec if isinstance(rec, PendingRecord) else None
+
+    def set_result(self, order_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store an EA report; returns the compact form that was kept."""
+        rec = ResultRecord(result, time.monotonic())
+        self._put(order_id, rec)
+        return rec.as_dict()
+
+    def set_closed(self, order_id: str, status: str) -> None:
+        """Record that ``order_id`` left the queue or stream undelivered with
+        ``status`` (see ClosedRecord); an EA result already stored is kept."""
+        self._put(order_id, ClosedRecord(status, time.monotonic()), keep_result=True)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        rec = self._get_record(order_id)
+        return rec.as_dict() if rec is not None else None
+
+    def get_json(self, order_id: str) -> Optional[bytes]:
+        """Status of ``order_id`` as ready-to-send JSON bytes."""
+        rec = self._get_record(order_id)
+        return rec.as_json() if rec is not None else None
+
+    def statuses_json(self, order_ids: List[str]) -> bytes:
+        """{"orders": {id: status, ...}} for a batch lookup, as JSON bytes."""
+        parts = []
+        for oid in order_ids:
+            body = self.get_json(oid)
+            parts.append(json_dumps(oid) + b":" + (body if body is not None else NOT_FOUND_JSON))
+        return b'{"orders":{' + b",".join(parts) + b"}}"
+
+    def wait_any(self, order_ids: List[str], timeout: float) -> None:
+        """Block until one of ``order_ids`` is no longer pending, or ``timeout``.
+
+        Returns at once if any of them is already settled or unknown.
+        """
+        if timeout <= 0 or not order_ids:
+            return
+        ids = set(order_ids)
+        event = threading.Event()
+        with self._lock:
+            if not all(isinstance(self._records.get(oid), PendingRecord) for oid in ids):
+                return
+            for oid in ids:
+                self._waiters.setdefault(oid, []).append(event)
+        try:
+            event.wait(timeout)
+        finally:
+            with self._lock:
+                for oid in ids:
+                    waiters = self._waiters.get(oid)
+                    if waiters and event in waiters:
+                        waiters.remove(event)
+                        if not waiters:
+                            del self._waiters[oid]
+
+    def _get_record(self, order_id: str) -> Any:
+        with self._lock:
+            rec = self._records.get(order_id)
+            if rec is None:
+                return None
+            if self.ttl > 0 and time.monotonic() - rec.created > self.ttl:
+                del self._records[order_id]
+                self.expired += 1
+                return None
+            return rec
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def _put(self, order_id: str, rec: Any, keep_result: bool = False) -> None:
+        with self._lock:
+            if keep_result and isinstance(self._records.get(order_id), ResultRecord):
+                return
+            self._records[order_id] = rec
+            self._records.move_to_end(order_id)
+            self._evict(rec.created)
+            if self._waiters and not isinstance(rec, PendingRecord):
+                for event in self._waiters.pop(order_id, ()):
+                    event.set()
+
+    def _evict(self, now: float) -> None:
+        records = self._records
+        if self.ttl > 0:
+            while records:
+                oldest = next(iter(records.values()))
+                if now - oldest.created <= self.ttl:
+                    break
+                records.popitem(last=False)
+                self.expired += 1
+        while len(records) > self.max_size:
+            records.popitem(last=False)
+            self.evicted += 1
+        if (self.evicted, self.expired) != self._reported and now - self._last_report >= self.report_secs:
+            results_log.warning("dropped %d over size limit, %d expired; %d records held",
+                                self.evicted - self._reported[0], self.expired - self._reported[1], len(records))
+            self._reported = (self.evicted, self.expired)
+            self._last_report = now
+
+
+class JsonRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Base handler speaking HTTP/1.1 with persistent connections.
+
+    Every response is framed with Content-Length (204 is bodiless by
+    definition), so clients can reuse the socket for the next poll. An idle
+    connection is closed after ``timeout`` seconds; servers override it from
+    their configuration. Under a PooledTCPServer an idle connection is
+    handed back to the server (``parked``) rather than waited on here.
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = 15.0
+    # Headers and body go out as separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40 ms per keep-alive response)
+    disable_nagle_algorithm = True
+    parked = False
+
+    def handle(self):
+        pooled = isinstance(self.server, PooledTCPServer)
+        while True:
+            if pooled and not self._request_ready(self.server.linger_secs()):
+                self.parked = True
+                return
+            self.handle_one_request()
+            if self.close_connection:
+                return
+
+    def _request_ready(self, wait: float) -> bool:
+        """True if the next request has (partly) arrived within ``wait`` seconds."""
+        self.connection.setblocking(False)
+        try:
+            if self.rfile.peek(1):
+                return True
+        except OSError:
+            return True  # Let handle_one_request see the error and close
+        finally:
+            self.connection.settimeout(self.timeout)
+        return wait > 0 and bool(select.select([self.connection], [], [], wait)[0])
+
+    def query_int(self, query: str, name: str, default: int, lo: int, hi: int) -> int:
+        """Read an integer query parameter, clamped to [lo, hi]."""
+        try:
+            val = int(parse_qs(query).get(name, [default])[0])
+        except (TypeError, ValueError):
+            return default
+        return max(lo, min(hi, val))
+
+    def send_json(self, code: int, obj: Any) -> None:
+        self.send_body(code, json_dumps(obj), "application/json")
+
+    def send_body(self, code: int, body: bytes, content_type: str) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self._send_connection_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_order_statuses(self, results: "ResultStore", query: str, max_ids: int, max_wait_ms: int,
+                            body: Optional[bytes] = None) -> None:
+        """Batch status lookup: GET ?ids=a,b[&wait=<ms>] or a POST body of
+        {"ids": [...], "wait": <ms>}.
+
+        Replies {"orders": {id: status}} once any listed order is no longer
+        pending or the wait runs out, whichever comes first.
+        """
+        if body is None:
+            ids = [i for i in parse_qs(query).get("ids", [""])[0].split(",") if i]
+            wait_ms = self.query_int(query, "wait", 0, 0, max_wait_ms)
+        else:
+            try:
+                req = json_loads(body)
+                if not isinstance(req.get("ids"), list):
+                    raise TypeError("ids must be a list")
+                ids = [str(i) for i in req["ids"]]
+                wait_ms = max(0, min(int(req.get("wait", 0)), max_wait_ms))
+            except (ValueError, TypeError, AttributeError):
+                self.send_json(400, {"error": 'Expected {"ids": [...], "wait": <ms>}'})
+                return
+        if len(ids) > max_ids:
+            self.send_json(400, {"error": f"At most {max_ids} ids per request"})
+            return
+        results.wait_any(ids, wait_ms / 1000.0)
+        self.send_body(200, results.statuses_json(ids), "application/json")
+
+    def iter_body(self, block: int = 65536):
+        """Yield the request body in blocks of at most ``block`` bytes.
+
+        Handles Content-Length and ``Transfer-Encoding: chunked`` bodies;
+        raises ValueError on broken chunk framing or a body that ends before
+        its Content-Length.
+        """
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            while True:
+                size_line = self.rfile.readline(1024)
+                if not size_line:
+                    raise ValueError("connection closed inside chunked body")
+                size = int(size_line.split(b";")[0].strip(), 16)
+                if size == 0:
+                    while self.rfile.readline(1024).strip():
+                        pass  # Trailer fields
+                    return
+                while size:
+                    data = self.rfile.read(min(size, block))
+                    if not data:
+                        raise ValueError("connection closed inside chunk")
+                    size -= len(data)
+                    yield data
+                if self.rfile.readline(4).strip():
+                    raise ValueError("missing CRLF after chunk")
+        remaining = int(self.headers.get("Content-Length") or 0)
+        while remaining > 0:
+            data = self.rfile.read(min(remaining, block))
+            if not data:
+                raise ValueError(f"connection closed {remaining} bytes before end of body")
+            remaining -= len(data)
+            yield data
+
+    def iter_body_lines(self, max_line: int = 65536):
+        """Yield the request body line by line (without line endings) as it
+        arrives. A line longer than ``max_line`` is skipped and yielded as
+        None so the caller can report it."""
+        carry = b""
+        skipping = False
+        for data in self.iter_body():
+            lines = (carry + data).split(b"\n")
+            carry = lines.pop()
+            for line in lines:
+                if skipping:
+                    skipping = False
+                    continue
+                yield None if len(line) > max_line else line.rstrip(b"\r")
+            if len(carry) > max_line:
+                if not skipping:
+                    yield None
+                skipping = True
+                carry = b""
+        if carry and not skipping:
+            yield None if len(carry) > max_line else carry.rstrip(b"\r")
+
+    def start_chunked(self, code: int, content_type: str, headers: Dict[str, str] = None) -> None:
+        """Begin a streamed response; follow with write_chunk() and end_chunked()."""
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self._send_connection_headers()
+        self.end_headers()
+
+    def write_chunk(self, data: bytes) -> None:
+        if data:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def end_chunked(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_empty(self, code: int) -> None:
+        self.send_response(code)
+        if code != 204:
+            self.send_header("Content-Length", "0")
+        self._send_connection_headers()
+        self.end_headers()
+
+    def send_not_found(self) -> None:
+        # An unread request body would be parsed as the next request
+        if self.headers.get("Content-Length") or self.headers.get("Transfer-Encoding"):
+            self.close_connection = True
+        self.send_empty(404)
+
+    def _send_connection_headers(self) -> None:
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        else:
+            self.send_header("Keep-Alive", f"timeout={int(self.timeout)}")
+
+    def log_error(self, format, *args):
+        # Idle keep-alive connections timing out are routine, not errors
+        if format.startswith("Request timed out"):
+            return
+        super().log_error(format, *args)
+
+    def log_message(self, format, *args):
+        # Through the queued logger, never straight to stderr from a worker
+        http_log.warning("%s %s", self.address_string(), format % args)
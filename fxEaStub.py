@@ -0,0 +1,177 @@
+"""Stub MT5 EA for offline load tests of fxServer.py / fxMarketServer.py.
+
+A StubEA polls the order endpoints over one keep-alive connection like the
+real EA in fxApiClient.mqh, "fills" each order after an optional delay and
+posts the result back to /submit_result. It records per-request latencies so
+benchmarks and replays can report on them.
+
+    python fxEaStub.py [--url http://127.0.0.1:12301] [--clients N] [--secs S]
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+
+def percentiles(samples: Sequence[float], qs: Sequence[float] = (0.5, 0.9, 0.99)) -> List[float]:
+    """Nearest-rank percentiles of ``samples`` (0.0 for an empty list)."""
+    if not samples:
+        return [0.0 for _ in qs]
+    ordered = sorted(samples)
+    n = len(ordered)
+    return [ordered[min(n - 1, max(0, int(q * n + 0.5) - 1))] for q in qs]
+
+
+def format_latency(name: str, samples: Sequence[float]) -> str:
+    p50, p90, p99 = percentiles(samples)
+    top = max(samples) if samples else 0.0
+    return (f"{name:<16} n={len(samples):<8} p50={p50 * 1000:8.3f}ms p90={p90 * 1000:8.3f}ms "
+            f"p99={p99 * 1000:8.3f}ms max={top * 1000:8.3f}ms")
+
+
+class StubEA:
+    """One simulated EA client.
+
+    ``wait_ms`` > 0 long-polls; ``batch`` > 1 uses /get_orders?max=N.
+    ``on_order(order, t_received)`` is called for each order before it is
+    filled, e.g. to correlate with when it was produced, and
+    ``on_fill(order, t_reported)`` once its result has been accepted.
+    """
+
+    def __init__(self, base_url: str, wait_ms: int = 1000, batch: int = 1,
+                 fill_ms: float = 0.0, idle_sleep: float = 0.05, on_order=None, on_fill=None):
+        url = urlsplit(base_url)
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 80
+        self.wait_ms = wait_ms
+        self.batch = max(1, batch)
+        self.fill_secs = fill_ms / 1000.0
+        self.idle_sleep = idle_sleep
+        self.on_order = on_order
+        self.on_fill = on_fill
+        self.fills = 0
+        self.empty_polls = 0
+        self.errors = 0
+        self.poll_latency: List[float] = []
+        self.submit_latency: List[float] = []
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None):
+        for attempt in (0, 1):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.wait_ms / 1000.0 + 10)
+            try:
+                headers = {"Content-Type": "application/json"} if body is not None else {}
+                self._conn.request(method, path, body=body, headers=headers)
+                resp = self._conn.getresponse()
+                return resp.status, resp.read()
+            except (OSError, http.client.HTTPException):
+                # Server closed an idle keep-alive connection; retry once fresh
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+
+    def poll(self) -> List[Dict[str, Any]]:
+        if self.batch > 1:
+            path = f"/get_orders?max={self.batch}"
+        else:
+            path = "/get_order"
+        if self.wait_ms > 0:
+            path += ("&" if "?" in path else "?") + f"wait={self.wait_ms}"
+        t0 = time.perf_counter()
+        status, body = self._request("GET", path)
+        self.poll_latency.append(time.perf_counter() - t0)
+        if status != 200:
+            return []
+        data = json.loads(body)
+        return data if isinstance(data, list) else [data]
+
+    def fill(self, order: Dict[str, Any]) -> None:
+        if self.fill_secs:
+            time.sleep(self.fill_secs)
+        result = {
+            "success": True,
+            "symbol": order.get("symbol"),
+            "order_type": order.get("order_type"),
+            "volume": order.get("volume"),
+            "price": order.get("price", 0.0),
+            "ticket": 1000000 + self.fills,
+            "order_id": order.get("order_id"),
+            "comment": order.get("comment", ""),
+        }
+        t0 = time.perf_counter()
+        self._request("POST", "/submit_result", json.dumps(result, separators=(',', ':')).encode())
+        t1 = time.perf_counter()
+        self.submit_latency.append(t1 - t0)
+        self.fills += 1
+        if self.on_fill is not None:
+            self.on_fill(order, t1)
+
+    def run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                orders = self.poll()
+            except (OSError, http.client.HTTPException, ValueError):
+                self.errors += 1
+                time.sleep(self.idle_sleep)
+                continue
+            if not orders:
+                self.empty_polls += 1
+                if self.wait_ms <= 0:
+                    time.sleep(self.idle_sleep)
+                continue
+            now = time.perf_counter()
+            for order in orders:
+                if self.on_order is not None:
+                    self.on_order(order, now)
+                try:
+                    self.fill(order)
+                except (OSError, http.client.HTTPException):
+                    self.errors += 1
+        if self._conn is not None:
+            self._conn.close()
+
+
+def start_clients(base_url: str, n: int, **kwargs) -> Tuple[List[StubEA], threading.Event, List[threading.Thread]]:
+    stop = threading.Event()
+    clients = [StubEA(base_url, **kwargs) for _ in range(n)]
+    threads = [threading.Thread(target=c.run, args=(stop,), name=f"stub-ea-{i}", daemon=True)
+               for i, c in enumerate(clients)]
+    for t in threads:
+        t.start()
+    return clients, stop, threads
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run stub EA clients against an fx server")
+    ap.add_argument("--url", default="http://127.0.0.1:12301")
+    ap.add_argument("--clients", type=int, default=1)
+    ap.add_argument("--wait-ms", type=int, default=1000, help="Long-poll wait; 0 polls with a short sleep")
+    ap.add_argument("--batch", type=int, default=1, help="Orders per poll via /get_orders")
+    ap.add_argument("--fill-ms", type=float, default=0.0, help="Simulated execution delay per order")
+    ap.add_argument("--secs", type=float, default=0.0, help="Stop after this many seconds (0 runs until Ctrl+C)")
+    args = ap.parse_args()
+
+    clients, stop, threads = start_clients(args.url, args.clients, wait_ms=args.wait_ms,
+                                           batch=args.batch, fill_ms=args.fill_ms)
+    try:
+        deadline = time.time() + args.secs if args.secs > 0 else None
+        while deadline is None or time.time() < deadline:
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for t in threads:
+        t.join(timeout=args.wait_ms / 1000.0 + 5)
+    print(f"fills={sum(c.fills for c in clients)} empty_polls={sum(c.empty_polls for c in clients)} "
+          f"errors={sum(c.errors for c in clients)}")
+    print(format_latency("poll", [x for c in clients for x in c.poll_latency]))
+    print(format_latency("submit_result", [x for c in clients for x in c.submit_latency]))
+
+
+if __name__ == "__main__":
+    main()
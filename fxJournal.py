@@ -0,0 +1,212 @@
+"""Append-only order journal shared by fxServer.py and fxMarketServer.py.
+
+Every queue transition is written as one JSON line:
+
+    {"e":"enq","o":{...order...}}        order queued
+    {"e":"deq","id":"<order_id>"}        order handed to an EA
+    {"e":"res","id":"<order_id>","r":{}} EA result received (or {"status":"expired"|"dropped"})
+
+Appends are made durable with group commit: callers hand their record to a
+single writer thread and block until it has been fsynced, but the writer
+fsyncs everything that arrived in the meantime together, so concurrent
+appenders share one fsync. On startup the journal is replayed to rebuild the
+queue and the results, and it is periodically rewritten to just that state so
+replay stays fast.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from fxCommon import ClosedRecord, PreparedOrder, json_dumps, json_loads, order_json
+
+
+class OrderJournal:
+    """Durable log of enqueue/dequeue/result events with group commit.
+
+    ``commit_ms`` optionally holds each batch open a little longer to gather
+    more appenders per fsync; by default batches form naturally from records
+    that arrive while the previous fsync is running.
+    """
+
+    def __init__(self, path: str, commit_ms: float = 0.0, compact_every: int = 10000,
+                 results_max: int = 100000):
+        self.path = path
+        self.commit_secs = max(0.0, commit_ms) / 1000.0
+        self.compact_every = max(1, int(compact_every))
+        self.results_max = max(1, int(results_max))
+        self.commits = 0
+        # Replayed/live state, used to write compacted snapshots
+        self.pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._since_compact = 0
+        self._queue: List[Any] = []
+        self._appended = 0
+        self._durable = 0
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._fp = None
+        self._thread: Optional[threading.Thread] = None
+
+    # -- startup -----------------------------------------------------------
+
+    def replay(self) -> int:
+        """Load the journal into ``pending``/``results``; returns records read.
+
+        A torn final line (crash mid-write) is ignored.
+        """
+        count = 0
+        try:
+            with open(self.path, "rb") as f:
+                for raw in f:
+                    try:
+                        rec = json_loads(raw)
+                    except ValueError:
+                        continue
+                    self._apply(rec)
+                    count += 1
+        except FileNotFoundError:
+            pass
+        return count
+
+    def restore_into(self, order_queue, order_results) -> None:
+        """Push replayed state into a server's OrderQueue and ResultStore."""
+        # Copies: re-queued orders can overflow a stream buffer, and the
+        # resulting drops are journaled (and applied) while this runs
+        for oid, result in list(self.results.items()):
+            if result.get("status") == "pending":
+                order_results.add_pending(oid)
+            elif result.get("status") in ClosedRecord.STATUSES:
+                order_results.set_closed(oid, result["status"])
+            else:
+                order_results.set_result(oid, result)
+        for order in list(self.pending.values()):
+            order_queue.put(PreparedOrder(order))
+
+    def start(self) -> None:
+        """Compact the replayed state into a fresh file and start the writer."""
+        self._write_snapshot()
+        self._thread = threading.Thread(target=self._writer, name="order-journal", daemon=True)
+        self._thread.start()
+
+    # -- appends -----------------------------------------------------------
+
+    def enqueued(self, order: Dict[str, Any]) -> None:
+        self._append([{"e": "enq", "o": order}])
+
+    def dequeued(self, order_ids: List[str]) -> None:
+        self._append([{"e": "deq", "id": oid} for oid in order_ids])
+
+    def closed(self, order_ids: List[str], status: str) -> None:
+        """Orders removed undelivered: dequeued with an "expired" or "dropped" status."""
+        self._append([rec for oid in order_ids
+                      for rec in ({"e": "deq", "id": oid}, {"e": "res", "id": oid, "r": {"status": status}})])
+
+    def result(self, order_id: str, result: Dict[str, Any]) -> None:
+        self._append([{"e": "res", "id": order_id, "r": result}])
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        """Queue records for the writer and wait until they are on disk."""
+        if not records:
+            return
+        data = b"".join(_encode(r) + b"\n" for r in records)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("journal is closed")
+            self._queue.append((data, records))
+            self._appended += 1
+            ticket = self._appended
+            self._cond.notify_all()
+            while self._durable < ticket and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise RuntimeError(f"journal write failed: {self._error}")
+
+    # -- writer thread -----------------------------------------------------
+
+    def _writer(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue and self._closed:
+                    return
+            # Optional commit window: let more appenders join this fsync
+            if self.commit_secs:
+                time.sleep(self.commit_secs)
+            with self._cond:
+                batch, self._queue = self._queue, []
+                upto = self._appended
+            try:
+                self._fp.write(b"".join(data for data, _ in batch))
+                self._fp.flush()
+                os.fsync(self._fp.fileno())
+                for _, records in batch:
+                    for rec in records:
+                        self._apply(rec)
+                self._since_compact += len(batch)
+                if self._since_compact >= self.compact_every:
+                    self._write_snapshot()
+            except BaseException as e:  # surface to every waiting appender
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable = upto
+                self.commits += 1
+                self._cond.notify_all()
+
+    def _apply(self, rec: Dict[str, Any]) -> None:
+        kind = rec.get("e")
+        if kind == "enq":
+            order = rec.get("o") or {}
+            oid = str(order.get("order_id", ""))
+            self.pending[oid] = order
+            self._remember(oid, {"status": "pending"})
+        elif kind == "deq":
+            self.pending.pop(str(rec.get("id")), None)
+        elif kind == "res":
+            self._remember(str(rec.get("id")), rec.get("r") or {})
+
+    def _remember(self, order_id: str, result: Dict[str, Any]) -> None:
+        self.results[order_id] = result
+        self.results.move_to_end(order_id)
+        while len(self.results) > self.results_max:
+            self.results.popitem(last=False)
+
+    def _write_snapshot(self) -> None:
+        """Atomically replace the journal with the current state."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            for oid, result in self.results.items():
+                if oid not in self.pending:
+                    f.write(json_dumps({"e": "res", "id": oid, "r": result}) + b"\n")
+            for order in self.pending.values():
+                f.write(_encode({"e": "enq", "o": order}) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self._fp is not None:
+            self._fp.close()
+        os.replace(tmp, self.path)
+        self._fp = open(self.path, "ab")
+        self._since_compact = 0
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+def _encode(rec: Dict[str, Any]) -> bytes:
+    # Enqueue records splice in the order's prepared encoding
+    if rec.get("e") == "enq":
+        return b'{"e":"enq","o":' + order_json(rec["o"]) + b"}"
+    return json_dumps(rec)
@@ -0,0 +1,170 @@
+"""Non-blocking structured logging for fxServer.py and fxMarketServer.py.
+
+Request and tailer threads only put records on a bounded queue; a single
+listener thread formats them (plain text or one JSON object per line) and does
+the console I/O. When the queue is full, records are dropped and counted
+rather than making the caller wait. Repetitive messages are rate limited per
+logger and message before they are queued.
+
+Loggers used by the servers:
+
+    fx.access   one line per HTTP request (FX_ACCESS_LOG=off silences it)
+    fx.orders   orders queued, sent and reported
+    fx.http     HTTP-level errors from the request handler
+    fx.results  result store evictions
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+access_log = logging.getLogger("fx.access")
+order_log = logging.getLogger("fx.orders")
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record.
+
+    The message is merged with its args in the caller (they may be mutated
+    later); timestamps and JSON encoding are left to the listener thread.
+    """
+
+    def __init__(self, q: "queue.Queue"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """Pass at most ``burst`` identical records per logger every ``interval`` s.
+
+    Records are identical when their formatted message is, so per-order lines
+    are never limited but a repeated warning or empty-poll line is. The first
+    record let through after some were suppressed carries a
+    ``suppressed`` count, which both formatters report.
+    """
+
+    def __init__(self, burst: int = 20, interval: float = 10.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            win = self._windows.get(key)
+            if win is None or now - win[0] >= self.interval:
+                suppressed = win[2] if win else 0
+                if len(self._windows) > 10000:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if win[1] < self.burst:
+                win[1] += 1
+                return True
+            win[2] += 1
+            return False
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" (+{suppressed} similar suppressed)"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg and any ``fields``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            out.update(fields)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            out["suppressed"] = suppressed
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str, separators=(',', ':'))
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Stopping waits for room rather than failing on a full queue
+        self.queue.put(self._sentinel)
+
+
+_listener: Optional[_Listener] = None
+
+
+def setup_logging(level: str = "INFO", fmt: str = "text", access: bool = True,
+                  queue_size: int = 10000, rate_burst: int = 20, rate_secs: float = 10.0,
+                  stream=None) -> DroppingQueueHandler:
+    """Route the "fx" loggers through a background writer; returns its handler.
+
+    ``access=False`` turns per-request logging off entirely.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    out = logging.StreamHandler(stream or sys.stdout)
+    out.setFormatter(JsonFormatter() if fmt.lower() == "json" else TextFormatter())
+    handler = DroppingQueueHandler(queue.Queue(maxsize=max(1, queue_size)))
+    handler.addFilter(RateLimitFilter(rate_burst, rate_secs))
+
+    root = logging.getLogger("fx")
+    root.handlers[:] = [handler]
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    root.propagate = False
+    access_log.disabled = not access
+
+    _listener = _Listener(handler.queue, out)
+    _listener.start()
+    return handler
+
+
+def dropped() -> int:
+    """Records dropped so far because the log queue was full."""
+    root = logging.getLogger("fx")
+    return sum(getattr(h, "dropped", 0) for h in root.handlers)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,12 +1,11 @@
-import http.server
-import socketserver
+import argparse
 import json
 import threading
-import queue
 import time
 import os
 from datetime import datetime
-from typing import Optional, Dict, Any
+from urllib.parse import parse_qs, urlsplit
+from typing import Optional, Dict, Any, List, Tuple
 
 # Local signal parser/tailer
 
@@ -34,18 +33,35 @@ load_dotenv()
 
 # Import after .env so signal monitor can read encoding overrides
 import signal_monitor as sm
+from fxCommon import (FanoutRing, IdempotencyIndex, JsonRequestHandler, OrderIdGenerator, OrderQueue, OrderStream, PooledTCPServer, PreparedOrder,
+                      ResultStore, json_dumps, json_loads, order_json, orders_json)
+from fxJournal import OrderJournal
+from fxLog import access_log, order_log, setup_logging, shutdown_logging
+from fxMetrics import OrderMetrics
 
 # Configuration (can be overridden by .env)
 PORT = int(os.environ.get("FX_MARKET_PORT", "12301"))
 LOG_PATH = os.environ.get("FX_LOG_PATH", "20250906.log")
 LOG_DIR = os.environ.get("FX_LOG_DIR", "").strip() or None
 LOG_PATH_TEMPLATE = os.environ.get("FX_LOG_PATH_TEMPLATE", "{YYYYMMDD}.log")
+# Several terminals in one process: ';'-separated [name=]path[|encoding]
+# entries, each a file, template or directory like FX_LOG_PATH (overrides it)
+LOG_PATHS = os.environ.get("FX_LOG_PATHS", "").strip()
 DEFAULT_VOLUME = float(os.environ.get("FX_DEFAULT_VOLUME", "0.01"))
 MAGIC_NUMBER = int(os.environ.get("FX_MAGIC_NUMBER", "987654"))
 ATR_MODE = os.environ.get("FX_ATR_MODE", "on").lower() in ("1","true","on","yes")
 ATR_PERIOD = int(os.environ.get("FX_ATR_PERIOD", "14"))
 ATR_MULT_SL = float(os.environ.get("FX_ATR_MULT_SL", "2.0"))
 ATR_MULT_TP = float(os.environ.get("FX_ATR_MULT_TP", "3.0"))
+# Seconds a queued order stays executable; older ones are dropped unsent and
+# reported as expired (0 = never). Under a backlog, newest-first ordering
+# serves fresh signals before older ones.
+ORDER_TTL_SECS = float(os.environ.get("FX_ORDER_TTL_SECS", "120"))
+QUEUE_NEWEST_FIRST = os.environ.get("FX_QUEUE_NEWEST_FIRST", "off").lower() in ("1","true","on","yes")
+# Alerts with the same symbol, side, timeframe, type and signal time (e.g.
+# printed once per chart) within this many seconds become one order; 0 = off
+DEDUP_SECS = float(os.environ.get("FX_DEDUP_SECS", "300"))
+DEDUP_MAX = int(os.environ.get("FX_DEDUP_MAX", "10000"))
 DEBUG = os.environ.get("FX_DEBUG", "off").lower() in ("1","true","on","yes")
 TAIL_FROM_BEGINNING = os.environ.get("FX_TAIL_FROM_BEGINNING", "off").lower() in ("1","true","on","yes")
 PROBE_ON_START = os.environ.get("FX_PROBE_ON_START", "on").lower() in ("1","true","on","yes")
@@ -53,7 +69,54 @@ TAIL_VIA_COMMAND = os.environ.get("FX_TAIL_VIA_COMMAND", "off").lower() in ("1",
 TAIL_CMD = os.environ.get("FX_TAIL_CMD", "").strip() or None
 AUTO_ROLLOVER = os.environ.get("FX_AUTO_ROLLOVER", "on").lower() in ("1","true","on","yes")
 ROLLOVER_CHECK_SECS = float(os.environ.get("FX_ROLLOVER_CHECK_SECS", "15"))
-ROLLOVER_FROM_BEGINNING = os.environ.get("FX_ROLLOVER_FROM_BEGINNING", "off").lower() in ("1","true","on","yes")
+ROLLOVER_FROM_BEGINNING = os.environ.get("FX_ROLLOVER_FROM_BEGINNING", "on").lower() in ("1","true","on","yes")
+# Persisted tail position (empty disables); a restart resumes from it
+CHECKPOINT_PATH = os.environ.get("FX_CHECKPOINT_PATH", "fx_tail_checkpoint.json").strip()
+CHECKPOINT_SECS = float(os.environ.get("FX_CHECKPOINT_SECS", "1.0"))
+CHECKPOINT_KEY = "default"
+# Upper bound for /get_order?wait=<ms> long-polls
+LONG_POLL_MAX_MS = int(os.environ.get("FX_LONG_POLL_MAX_MS", "30000"))
+# Cap on orders returned by one /get_orders?max=N call
+MAX_BATCH = int(os.environ.get("FX_MAX_BATCH", "100"))
+# Most order IDs looked up by one batch /order_status request
+MAX_STATUS_IDS = int(os.environ.get("FX_MAX_STATUS_IDS", "1000"))
+# Order status store bounds: most records kept, and seconds each is kept
+RESULTS_MAX = int(os.environ.get("FX_RESULTS_MAX", "100000"))
+RESULTS_TTL_SECS = float(os.environ.get("FX_RESULTS_TTL_SECS", "86400"))
+# Durable order journal (empty disables): replayed on start to restore the queue
+JOURNAL_PATH = os.environ.get("FX_JOURNAL_PATH", "").strip()
+JOURNAL_COMMIT_MS = float(os.environ.get("FX_JOURNAL_COMMIT_MS", "0"))
+JOURNAL_COMPACT_EVERY = int(os.environ.get("FX_JOURNAL_COMPACT_EVERY", "10000"))
+# Order delivery: "queue" (EAs take orders via /get_order[s]), "stream"
+# (pushed over /stream_orders, delivered once acked via /ack_orders) or
+# "fanout" (every consumer gets every order via /get_order[s]?consumer=ID)
+ORDER_DELIVERY = os.environ.get("FX_ORDER_DELIVERY", "queue").strip().lower() or "queue"
+if ORDER_DELIVERY not in ("queue", "stream", "fanout"):
+    print(f"Unknown FX_ORDER_DELIVERY={ORDER_DELIVERY!r}; using queue")
+    ORDER_DELIVERY = "queue"
+STREAM_DELIVERY = ORDER_DELIVERY == "stream"
+FANOUT_DELIVERY = ORDER_DELIVERY == "fanout"
+# Fan-out consumers (account or terminal IDs) registered at startup; empty
+# lets any ID register on its first poll. Overflow policy for a consumer
+# that falls FX_STREAM_BUFFER orders behind: "skip" or "latest".
+FANOUT_CONSUMERS = [c.strip() for c in os.environ.get("FX_FANOUT_CONSUMERS", "").split(",") if c.strip()]
+FANOUT_OVERFLOW = os.environ.get("FX_FANOUT_OVERFLOW", "skip").strip().lower() or "skip"
+# Orders kept for /stream_orders, and seconds between keep-alive comments
+STREAM_BUFFER = int(os.environ.get("FX_STREAM_BUFFER", "10000"))
+STREAM_HEARTBEAT_SECS = float(os.environ.get("FX_STREAM_HEARTBEAT_SECS", "15"))
+# HTTP worker pool: concurrent requests served, and connections allowed to wait
+HTTP_WORKERS = int(os.environ.get("FX_HTTP_WORKERS", "32"))
+HTTP_BACKLOG = int(os.environ.get("FX_HTTP_BACKLOG", "128"))
+# Idle seconds before a persistent (keep-alive) connection is closed
+KEEPALIVE_IDLE_SECS = float(os.environ.get("FX_KEEPALIVE_IDLE_SECS", "15"))
+# Logging: level, text|json output, per-request access lines, queue bound and
+# how many identical messages may pass per FX_LOG_RATE_SECS (0 = unlimited)
+LOG_LEVEL = os.environ.get("FX_LOG_LEVEL", "INFO").strip() or "INFO"
+LOG_FORMAT = os.environ.get("FX_LOG_FORMAT", "text").strip().lower() or "text"
+ACCESS_LOG = os.environ.get("FX_ACCESS_LOG", "on").lower() in ("1","true","on","yes")
+LOG_QUEUE = int(os.environ.get("FX_LOG_QUEUE", "10000"))
+LOG_RATE_BURST = int(os.environ.get("FX_LOG_RATE_BURST", "20"))
+LOG_RATE_SECS = float(os.environ.get("FX_LOG_RATE_SECS", "10"))
 
 
 def probe_file(path: str):
@@ -90,108 +153,318 @@ def probe_file(path: str):
         print(f"[PROBE] error: {e}")
 
 
-def resolve_log_path() -> str:
+def resolve_log_path(log_path: Optional[str] = None, log_dir: Optional[str] = None) -> str:
     """Resolve the actual log path to tail, supporting templates and directories.
 
+    ``log_path``/``log_dir`` default to FX_LOG_PATH/FX_LOG_DIR.
+
     Precedence:
-    1) If LOG_PATH contains {YYYYMMDD} or %Y%m%d, substitute today's date.
-    2) If LOG_PATH points to a directory, join with today's YYYYMMDD.log.
-    3) If LOG_DIR is set, join with today's YYYYMMDD.log.
-    4) Else, use LOG_PATH as-is.
+    1) If log_path contains {YYYYMMDD} or %Y%m%d, substitute today's date.
+    2) If log_path points to a directory, join with today's YYYYMMDD.log.
+    3) If log_dir is set, join with today's YYYYMMDD.log.
+    4) Else, use log_path as-is.
     """
+    if log_path is None:
+        log_path, log_dir = LOG_PATH, LOG_DIR
     today = datetime.now().strftime('%Y%m%d')
     # 1) Template substitution
-    if ('{YYYYMMDD}' in LOG_PATH) or ('%Y%m%d' in LOG_PATH):
-        p = LOG_PATH.replace('{YYYYMMDD}', today).replace('%Y%m%d', today)
+    if ('{YYYYMMDD}' in log_path) or ('%Y%m%d' in log_path):
+        p = log_path.replace('{YYYYMMDD}', today).replace('%Y%m%d', today)
         return p
-    # 2) If LOG_PATH is a directory
+    # 2) If log_path is a directory
     try:
-        if LOG_PATH and os.path.isdir(LOG_PATH):
-            return os.path.join(LOG_PATH, f"{today}.log")
+        if log_path and os.path.isdir(log_path):
+            return os.path.join(log_path, f"{today}.log")
     except Exception:
         pass
-    # 3) LOG_DIR
-    if LOG_DIR:
-        return os.path.join(LOG_DIR, f"{today}.log")
+    # 3) log_dir
+    if log_dir:
+        return os.path.join(log_dir, f"{today}.log")
     # 4) As-is
-    return LOG_PATH
+    return log_path
 
 
-def iter_tail_lines_native(enc: str, from_beginning: bool):
-    """Tail lines using shared-open and support daily rollover to new file.
+def parse_log_sources(spec: str) -> List[Tuple[str, str, Optional[str]]]:
+    """Split FX_LOG_PATHS into (terminal, path, encoding) entries.
 
-    If AUTO_ROLLOVER is enabled and resolve_log_path() changes to a new
-    existing file, switches the tail to that path.
+    Entries are ';'-separated, each ``[name=]path[|encoding]``; unnamed
+    entries are called term1, term2, ... in order.
     """
-    import time as _time
+    out: List[Tuple[str, str, Optional[str]]] = []
+    for entry in spec.split(';'):
+        entry = entry.strip()
+        if not entry:
+            continue
+        enc = None
+        if '|' in entry:
+            entry, enc = entry.rsplit('|', 1)
+            enc = enc.strip() or None
+        name = f"term{len(out) + 1}"
+        if '=' in entry:
+            name, entry = entry.split('=', 1)
+        out.append((name.strip(), entry.strip(), enc))
+    return out
 
-    current_path = resolve_log_path()
-    last_check = _time.time()
-    def _open_at_start(path: str, start_from_beginning: bool):
-        raw, text = sm._open_shared_text(path)  # type: ignore[attr-defined]
-        if not start_from_beginning:
-            try:
-                text.seek(0, os.SEEK_END)
-            except Exception:
-                pass
-        return raw, text
 
-    raw = text = None
+class TailSource:
+    """One terminal's log as followed by the tail loop.
+
+    Tracks the path spec (file, template or directory), the file currently
+    open and its LogReader, whose ``offset`` is this source's position. The
+    single-log setup (FX_LOG_PATH/FX_LOG_DIR) is one source with an empty
+    name; its signals are not tagged.
+    """
+
+    def __init__(self, name: str, spec: str, log_dir: Optional[str], encoding: str):
+        self.name = name
+        self.spec = spec
+        self.log_dir = log_dir
+        self.encoding = encoding
+        self.path = self.resolve()
+        self.reader = None
+        self.resume_offset: Optional[int] = None
+        self.last_check = time.time()
+        self._open_failed = False
+
+    @property
+    def checkpoint_key(self) -> str:
+        return self.name or CHECKPOINT_KEY
+
+    def resolve(self) -> str:
+        return resolve_log_path(self.spec, self.log_dir)
+
+    @property
+    def dated(self) -> bool:
+        """True if ``spec`` names a new YYYYMMDD.log each day (template or directory)."""
+        if '{YYYYMMDD}' in self.spec or '%Y%m%d' in self.spec or self.log_dir:
+            return True
+        try:
+            return bool(self.spec) and os.path.isdir(self.spec)
+        except OSError:
+            return False
+
+    def open(self, from_beginning: bool) -> bool:
+        """Open ``path``; False (and retried later) if it cannot be opened yet."""
+        try:
+            reader = sm.open_log_reader(self.path, from_beginning, self.encoding)
+        except OSError as e:
+            if not self._open_failed:
+                print(f"[TAIL] {self.label()}: cannot open {self.path}: {e}; will retry")
+            self._open_failed = True
+            return False
+        self._open_failed = False
+        if self.resume_offset is not None and reader.size() >= self.resume_offset:
+            reader.seek(self.resume_offset)
+        self.resume_offset = None
+        self.reader = reader
+        return True
+
+    def read_lines(self) -> List[str]:
+        if self.reader is None:
+            return []
+        try:
+            return self.reader.read_lines()
+        except Exception:
+            # Reopen same path on transient errors, resuming at the offset
+            offset = self.reader.offset
+            self.close()
+            self.resume_offset = offset
+            self.open(True)
+            return []
+
+    def drain(self) -> List[str]:
+        """Read the open file to its end, including an unterminated last line."""
+        out: List[str] = []
+        while True:
+            lines = self.read_lines()
+            if not lines:
+                break
+            out.extend(lines)
+        if self.reader is not None and self.reader.pending_bytes():
+            tail = self.reader.read_partial()
+            if tail:
+                out.append(tail)
+        return out
+
+    def lag(self) -> int:
+        """Bytes in the file past the last complete line read."""
+        reader = self.reader
+        try:
+            return reader.size() - reader.offset if reader is not None else 0
+        except (OSError, ValueError):
+            return 0
+
+    def label(self) -> str:
+        return self.name or self.path
+
+    def close(self) -> None:
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        self.resume_offset = None
+
+
+def build_tail_sources(default_enc: str) -> List[TailSource]:
+    if LOG_PATHS:
+        return [TailSource(name, path, None, enc or default_enc)
+                for name, path, enc in parse_log_sources(LOG_PATHS)]
+    return [TailSource("", LOG_PATH, LOG_DIR, default_enc)]
+
+
+def iter_tail_lines_native(sources: List[TailSource], from_beginning: bool):
+    """Tail every source in one loop, yielding ``(source, line)`` pairs.
+
+    All sources share one change watcher (sm.make_watcher), so an append to
+    any log wakes the loop at once; each wakeup reads at most one block per
+    source, so a busy terminal cannot starve the others.
+
+    With AUTO_ROLLOVER, a source at EOF whose path now resolves to a new
+    existing file drains the old file to its end, then reads the new one from
+    the start. Event backends also report new files in the log directories,
+    so this happens on the wakeup caused by the new file's creation; with
+    polling it is re-checked every poll interval. ROLLOVER_CHECK_SECS is the
+    safety re-check for event backends and the retry interval for logs that
+    could not be opened yet.
+    """
+    watcher = sm.make_watcher([s.path for s in sources])
+    if DEBUG:
+        print(f"[TAIL] watcher={type(watcher).__name__} sources={len(sources)}")
+    changed = False
+    checkpoint = sm.TailCheckpoint(CHECKPOINT_PATH, CHECKPOINT_SECS) if CHECKPOINT_PATH else None
+
     try:
-        raw, text = _open_at_start(current_path, from_beginning)
+        for src in sources:
+            opened = src.open(from_beginning)
+            cp = checkpoint.get(src.checkpoint_key) if checkpoint else None
+            if cp:
+                # Even without today's file yet, a previous day's is drained
+                for line in _resume_from_checkpoint(cp, src, checkpoint):
+                    yield src, line
+            if opened and checkpoint:
+                checkpoint.update(src.checkpoint_key, src.path, src.reader)
+        if checkpoint:
+            checkpoint.flush()
         while True:
-            # Try read next line
-            try:
-                line = text.readline()
-            except Exception:
-                # Reopen same path on transient errors
-                try:
-                    text.detach()
-                except Exception:
-                    pass
+            # Read the next block of complete lines from each source
+            busy = False
+            now = time.time()
+            for src in sources:
+                lines = src.read_lines()
+                if lines:
+                    busy = True
+                    for line in lines:
+                        yield src, line
+                    # Reached only once the consumer has handled every line
+                    if checkpoint:
+                        checkpoint.update(src.checkpoint_key, src.path, src.reader)
+                    continue
+                # At EOF: look for the next day's log, or retry an unopened one
+                if not (changed or not watcher.event_driven or now - src.last_check >= ROLLOVER_CHECK_SECS):
+                    continue
+                src.last_check = now
+                if src.reader is None:
+                    busy = src.open(True) or busy
+                    continue
+                new_path = src.resolve() if AUTO_ROLLOVER else src.path
+                if new_path == src.path or not os.path.exists(new_path):
+                    continue
+                if DEBUG:
+                    print(f"[ROLLOVER] {src.label()}: switching from {src.path} to {new_path}")
+                # Finish the old file first: lines written just before the
+                # switch would otherwise be lost
+                for line in src.drain():
+                    yield src, line
+                src.close()
+                src.path = new_path
                 try:
-                    raw.close()
-                except Exception:
+                    watcher.add(new_path)
+                except OSError:
                     pass
-                _time.sleep(0.2)
-                raw, text = _open_at_start(current_path, False)
+                if src.open(ROLLOVER_FROM_BEGINNING) and checkpoint:
+                    checkpoint.update(src.checkpoint_key, src.path, src.reader)
+                busy = True
+            if busy:
                 continue
 
-            if line:
-                yield line.rstrip("\r\n")
-                continue
+            if checkpoint:
+                checkpoint.flush()
+            changed = watcher.wait()
+    finally:
+        watcher.close()
+        if checkpoint:
+            checkpoint.flush()
+        for src in sources:
+            src.close()
 
-            # No new line, consider rollover
-            now = _time.time()
-            if AUTO_ROLLOVER and (now - last_check) >= ROLLOVER_CHECK_SECS:
-                last_check = now
-                new_path = resolve_log_path()
-                if new_path != current_path and os.path.exists(new_path):
-                    if DEBUG:
-                        print(f"[ROLLOVER] switching from {current_path} to {new_path}")
-                    # swap to new file
-                    try:
-                        text.detach()
-                    except Exception:
-                        pass
-                    try:
-                        raw.close()
-                    except Exception:
-                        pass
-                    current_path = new_path
-                    raw, text = _open_at_start(current_path, ROLLOVER_FROM_BEGINNING)
-                    continue
 
-            _time.sleep(0.2)
-    finally:
-        try:
-            text.detach()  # type: ignore
-        except Exception:
-            pass
+def _resume_from_checkpoint(cp: Dict[str, Any], src: TailSource, checkpoint: "sm.TailCheckpoint"):
+    """Position ``src.reader`` from a saved checkpoint, yielding missed lines first.
+
+    - Same file, unchanged up to the saved offset: resume at that offset.
+    - Same path but truncated or replaced: read it from the start.
+    - For a dated source (template or directory), an earlier YYYYMMDD.log in
+      the same directory (the day rolled over while we were down): drain it
+      from its offset, then read the current file from the start. If the
+      current file does not exist yet (``src.reader`` is None), the drained
+      position is checkpointed and the new file is read from the start once
+      it appears.
+    - Any other checkpoint is ignored.
+    """
+    current_path, reader = src.path, src.reader
+    cp_path = cp.get("path", "")
+    if cp_path == current_path:
+        if reader is None:
+            return  # Opened and resumed from the start once it reappears
+        if sm.TailCheckpoint.matches(cp, reader):
+            _seek_checkpoint(reader, cp)
+            print(f"[CHECKPOINT] resuming {current_path} at byte {reader.offset}")
+        else:
+            reader.seek(0)
+            print(f"[CHECKPOINT] {current_path} changed since checkpoint; reading from start")
+        return
+    if not (src.dated and _is_earlier_daily_log(cp_path, current_path)):
+        print(f"[CHECKPOINT] ignoring checkpoint for unrelated file {cp_path}")
+        return
+    try:
+        old = sm.open_log_reader(cp_path, True, src.encoding)
+    except OSError:
+        old = None
+    if old is not None:
         try:
-            raw.close()  # type: ignore
-        except Exception:
-            pass
+            if sm.TailCheckpoint.matches(cp, old):
+                _seek_checkpoint(old, cp)
+                print(f"[CHECKPOINT] draining {cp_path} from byte {old.offset} before {current_path}")
+                while True:
+                    lines = old.read_lines()
+                    if not lines:
+                        break
+                    yield from lines
+                if reader is None:
+                    checkpoint.update(src.checkpoint_key, cp_path, old)
+        finally:
+            old.close()
+    if reader is None:
+        print(f"[CHECKPOINT] {current_path} not there yet; will read it from start")
+        return
+    reader.seek(0)
+    print(f"[CHECKPOINT] reading {current_path} from start after rollover")
+
+
+def _seek_checkpoint(reader, cp: Dict[str, Any]) -> None:
+    """Seek ``reader`` to a matching checkpoint's offset. The checkpointed last
+    line is restored too, so saving before another line is read keeps its hash."""
+    offset, n = int(cp["offset"]), int(cp.get("line_len", 0))
+    reader.seek(offset)
+    reader.last_line = reader.read_at(offset - n, n)
+
+
+def _is_earlier_daily_log(old_path: str, new_path: str) -> bool:
+    """True if both are YYYYMMDD.log files in one directory and ``old_path``
+    is for an earlier day."""
+    old_dir, old_name = os.path.split(os.path.abspath(old_path))
+    new_dir, new_name = os.path.split(os.path.abspath(new_path))
+    return (old_dir == new_dir and bool(sm.DAILY_LOG_RE.match(old_name))
+            and bool(sm.DAILY_LOG_RE.match(new_name)) and old_name < new_name)
 
 
 def _ps_encoding_for(enc: str) -> str:
@@ -253,19 +526,138 @@ SYMBOL_FILTER = None
 if os.environ.get("FX_SYMBOLS"):
     SYMBOL_FILTER = {s.strip().upper() for s in os.environ["FX_SYMBOLS"].split(',') if s.strip()}
 
-order_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
-order_results: Dict[str, Any] = {}
+def close_orders(orders: List[Dict[str, Any]], status: str) -> None:
+    """Settle orders removed without being delivered, so they are not re-sent
+    after a restart; ``status`` is "expired" or "dropped"."""
+    ids = [o["order_id"] for o in orders]
+    for oid in ids:
+        order_results.set_closed(oid, status)
+    if journal:
+        journal.closed(ids, status)
+    metrics.closed(ids, status)
+    order_log.warning("Closed %d %s orders", len(ids), status, extra={"fields": {"order_ids": ids}})
+
 
+def expire_orders(orders: List[Dict[str, Any]]) -> None:
+    """Record orders the queue dropped because their expires_at passed."""
+    close_orders(orders, "expired")
 
-def enqueue_from_signal(sig: Dict[str, Any]):
+
+def drop_orders(orders: List[Dict[str, Any]]) -> None:
+    """Record orders trimmed from the full stream buffer unread, or that no
+    fan-out consumer can receive."""
+    close_orders(orders, "dropped")
+
+
+order_queue = OrderQueue(QUEUE_NEWEST_FIRST, expire_orders)
+# Every order, by sequence number: the delivery path in "stream" and
+# "fanout" modes (unused in "queue" mode, where orders are taken once)
+if FANOUT_DELIVERY:
+    order_stream = FanoutRing(STREAM_BUFFER, FANOUT_CONSUMERS, FANOUT_OVERFLOW, drop_orders)
+else:
+    order_stream = OrderStream(STREAM_BUFFER, drop_orders)
+order_results = ResultStore(RESULTS_MAX, RESULTS_TTL_SECS)
+order_ids = OrderIdGenerator()
+# IDs already queued, so a repeated signal id is not enqueued twice
+order_index = IdempotencyIndex(RESULTS_MAX, RESULTS_TTL_SECS)
+# Recently seen alerts, so copies from other charts coalesce into one order
+recent_signals = IdempotencyIndex(DEDUP_MAX, DEDUP_SECS) if DEDUP_SECS > 0 else None
+journal = OrderJournal(JOURNAL_PATH, JOURNAL_COMMIT_MS, JOURNAL_COMPACT_EVERY, RESULTS_MAX) if JOURNAL_PATH else None
+
+# Served at GET /metrics (Prometheus text format)
+metrics = OrderMetrics(order_queue if ORDER_DELIVERY == "queue" else order_stream, order_results,
+                       ("/get_order", "/get_orders", "/order_status", "/submit_result",
+                        "/stream_orders", "/ack_orders"))
+metrics.registry.gauge("fx_stream_dropped", "Orders dropped from the stream buffer undelivered",
+                       lambda: order_stream.dropped)
+fanout_missed = metrics.registry.counter("fx_fanout_missed_total",
+                                         "Orders a fan-out consumer missed through buffer overflow", ("consumer",))
+lines_read = metrics.registry.counter("fx_tail_lines_total", "Log lines read by the tailer")
+signals_parsed = metrics.registry.counter("fx_tail_signals_total", "Alert lines parsed into signals")
+signals_coalesced = metrics.registry.counter("fx_signals_coalesced_total",
+                                             "Duplicate alerts merged into an earlier order")
+signals_stale = metrics.registry.counter("fx_signals_stale_total",
+                                         "Alerts older than FX_ORDER_TTL_SECS when read, not queued")
+# Sources followed by the tailer thread (filled in by tail_log_and_enqueue)
+tail_sources: List[TailSource] = []
+metrics.registry.gauge("fx_tail_lag_bytes", "Bytes written to the logs but not yet read",
+                       lambda: sum(src.lag() for src in tail_sources))
+
+
+def log_seconds(log_time: str) -> Optional[float]:
+    """Seconds since midnight of a "HH:MM:SS.mmm" log time column."""
+    try:
+        h, m, s = log_time.split(":")
+        return int(h) * 3600 + int(m) * 60 + float(s)
+    except ValueError:
+        return None
+
+
+def log_timestamp(log_time: str, path: str, now: float) -> Optional[float]:
+    """Unix time of a line's "HH:MM:SS.mmm" column (terminal local time).
+
+    The date comes from a YYYYMMDD.log file name. For other files the line
+    is taken to be from the 12 hours around ``now``, so a 23:59 entry read
+    just after midnight is yesterday's.
+    """
+    stamp = log_seconds(log_time)
+    if stamp is None:
+        return None
+    name = os.path.basename(path)
+    if sm.DAILY_LOG_RE.match(name):
+        day = datetime.strptime(name[:8], "%Y%m%d")
+        return day.timestamp() + stamp
+    t = datetime.fromtimestamp(now)
+    delay = (t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6 - stamp) % 86400
+    if delay > 43200:
+        delay -= 86400  # clock skew: terminal slightly ahead of us
+    return now - delay
+
+
+def observe_log_delay(logged_at: float, now: float) -> None:
+    """Record how long after its terminal timestamp a line was read."""
+    metrics.stage.observe(max(0.0, now - logged_at), "log_to_read")
+
+
+def enqueue_from_signal(sig: Dict[str, Any], t_read: Optional[float] = None,
+                        logged_at: Optional[float] = None,
+                        t_parsed: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Build the market order for ``sig`` and queue it; returns the order,
+    or None when the signal is not tradable here. ``t_read`` and
+    ``t_parsed`` are monotonic stamps of the line's read and parse.
+
+    ``logged_at`` is the alert's own Unix time, if known: the order's expiry
+    counts from it, and an alert already past FX_ORDER_TTL_SECS (e.g. one
+    re-read from a checkpoint after downtime) is not queued at all.
+    """
     side = sig.get("side", "").lower()
     symbol = sig.get("symbol", "").upper()
     if not symbol or side not in ("buy", "sell"):
-        return
+        return None
     if SYMBOL_FILTER and symbol not in SYMBOL_FILTER:
-        return
+        return None
+    expires_at = None
+    if ORDER_TTL_SECS > 0:
+        expires_at = round((logged_at or time.time()) + ORDER_TTL_SECS, 3)
+        if expires_at <= time.time():
+            signals_stale.inc()
+            order_log.info("Alert logged at %s is older than %ss; not queued",
+                           sig.get("log_time"), ORDER_TTL_SECS)
+            return None
+    if recent_signals is not None:
+        key = (symbol, side, (sig.get("timeframe") or "").upper(), sig.get("type", ""),
+               sig.get("signal_time") or sig.get("signal_datetime") or "")
+        if not recent_signals.claim(key):
+            signals_coalesced.inc()
+            order_log.debug("Duplicate alert coalesced: %s", " ".join(key))
+            return None
 
-    order_id = sig.get("id") or str(int(time.time() * 1000))
+    order_id = sig.get("id")
+    if not order_id:
+        order_id = order_ids.claim_new(order_index)
+    elif not order_index.claim(order_id):
+        order_log.info("Order %s already queued; ignoring repeat", order_id)
+        return None
     order_type = "BUY" if side == "buy" else "SELL"
     comment = f"{sig.get('type','sig')} {sig.get('timeframe','')} {sig.get('source','')} {sig.get('signal_time', sig.get('signal_datetime',''))}".strip()
 
@@ -280,6 +672,8 @@ def enqueue_from_signal(sig: Dict[str, Any]):
         "comment": comment,
         "magic_number": MAGIC_NUMBER,
     }
+    if expires_at is not None:
+        order["expires_at"] = expires_at
 
     # Include ATR-based SL/TP parameters for EA to compute
     if ATR_MODE:
@@ -288,108 +682,398 @@ def enqueue_from_signal(sig: Dict[str, Any]):
         order["atr_mult_sl"] = ATR_MULT_SL
         order["atr_mult_tp"] = ATR_MULT_TP
         order["timeframe"] = sig.get("timeframe") or ""
+    if sig.get("terminal"):
+        order["terminal"] = sig["terminal"]
+    order = PreparedOrder(order)  # Encoded once here; every later send reuses it
 
-    order_queue.put(order)
-    order_results[order_id] = {"status": "pending"}
-    print(f"Enqueued market order from signal: {order}")
+    if journal:
+        journal.enqueued(order)
+    order_results.add_pending(order_id, t_read)
+    if ORDER_DELIVERY == "queue":
+        order_queue.put(order)
+    else:
+        order_stream.put(order)
+    metrics.enqueued(t_parsed, time.monotonic())
+    order_log.info("Enqueued market order %s from signal", order_id, extra={"fields": order})
+    return order
 
 
 def tail_log_and_enqueue():
     enc = os.environ.get('FX_LOG_ENCODING') or ('utf-16' if os.name == 'nt' else 'utf-16-le')
     mode = 'command' if TAIL_VIA_COMMAND else 'native'
-    resolved_path = resolve_log_path()
-    print(f"Tailing log for signals: {resolved_path} (encoding={enc}, from_beginning={TAIL_FROM_BEGINNING}, mode={mode})")
-    if PROBE_ON_START:
-        probe_file(resolved_path)
+    tail_sources[:] = build_tail_sources(enc)
+    for src in tail_sources:
+        terminal = f"[{src.name}] " if src.name else ""
+        print(f"Tailing log for signals: {terminal}{src.path} (encoding={src.encoding}, from_beginning={TAIL_FROM_BEGINNING}, mode={mode})")
+        if PROBE_ON_START:
+            probe_file(src.path)
     try:
         if TAIL_VIA_COMMAND:
-            line_iter = iter_tail_lines_command(resolved_path, enc)
+            src = tail_sources[0]
+            if len(tail_sources) > 1:
+                print("[TAILCMD] command mode follows only the first log in FX_LOG_PATHS")
+            line_iter = ((src, line) for line in iter_tail_lines_command(src.path, enc))
         else:
-            line_iter = iter_tail_lines_native(enc, TAIL_FROM_BEGINNING)
-        for raw_line in line_iter:
+            line_iter = iter_tail_lines_native(tail_sources, TAIL_FROM_BEGINNING)
+        for src, raw_line in line_iter:
+            t_read = time.monotonic()
+            lines_read.inc()
             if DEBUG:
-                print(f"[TAIL] {raw_line}")
+                print(f"[TAIL] {src.name + ': ' if src.name else ''}{raw_line}")
             parts = raw_line.split("\t")
             sig = sm.parse_signal(parts)
             if not sig:
                 if DEBUG:
                     print("[PARSE] no match")
                 continue
+            t_parsed = time.monotonic()
+            metrics.parsed(t_read, t_parsed)
+            if src.name:
+                sig["terminal"] = src.name
             if DEBUG:
                 try:
-                    print(f"[PARSE] {json.dumps(sig, ensure_ascii=False)}")
+                    print(f"[PARSE] {json_dumps(sig).decode()}")
                 except Exception:
                     print(f"[PARSE] {sig}")
-            enqueue_from_signal(sig)
+            signals_parsed.inc()
+            now = time.time()
+            logged_at = log_timestamp(sig.get("log_time") or "", src.path, now)
+            if logged_at is not None:
+                observe_log_delay(logged_at, now)
+            enqueue_from_signal(sig, t_read, logged_at, t_parsed)
     except Exception as e:
         print(f"Signal tailer error: {e}")
 
 
-class RequestHandler(http.server.BaseHTTPRequestHandler):
+class RequestHandler(JsonRequestHandler):
+    timeout = KEEPALIVE_IDLE_SECS
+
     def log_request(self, code='-', size='-'):
-        print(f"Request: {self.requestline}, Code: {code}, Client: {self.client_address}")
+        metrics.request(self.path, code)
+        access_log.info("%s \"%s\" %s", self.client_address[0], self.requestline, code)
 
     def do_GET(self):
-        if self.path == "/get_order":
-            try:
-                order = order_queue.get_nowait()
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps(order, separators=(',', ':')).encode())
-                print(f"Sent order to MT5: {order}")
-            except queue.Empty:
-                self.send_response(204)
-                self.end_headers()
-        elif self.path.startswith("/order_status/"):
-            order_id = self.path.split("/")[-1]
-            result = order_results.get(order_id, {"error": "Order not found"})
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps(result, separators=(',', ':')).encode())
+        url = urlsplit(self.path)
+        if url.path == "/get_order":
+            # Optional long-poll: /get_order?wait=<ms> holds the request until
+            # an order arrives or the wait expires (then 204 as before).
+            orders = self.take_orders(url.query, 1)
+            if orders is None:
+                return
+            if not orders:
+                self.send_empty(204)
+                return
+            order = orders[0]
+            metrics.sent([order["order_id"]])
+            self.send_body(200, order_json(order), "application/json")
+            order_log.info("Sent order %s to MT5", order["order_id"], extra={"fields": order})
+        elif url.path == "/get_orders":
+            # Batch dequeue: /get_orders?max=N[&wait=<ms>] returns a JSON array
+            # of up to N orders taken atomically, or 204 when none arrive.
+            max_n = self.query_int(url.query, "max", MAX_BATCH, 1, MAX_BATCH)
+            orders = self.take_orders(url.query, max_n)
+            if orders is None:
+                return
+            if not orders:
+                self.send_empty(204)
+                return
+            metrics.sent([o["order_id"] for o in orders])
+            self.send_body(200, orders_json(orders), "application/json")
+            order_log.info("Sent %d orders to MT5", len(orders),
+                           extra={"fields": {"order_ids": [o["order_id"] for o in orders]}})
+        elif url.path.startswith("/order_status/"):
+            # ?wait=<ms> holds the reply until the order is no longer pending
+            order_id = url.path.split("/")[-1]
+            wait_ms = self.query_int(url.query, "wait", 0, 0, LONG_POLL_MAX_MS)
+            order_results.wait_any([order_id], wait_ms / 1000.0)
+            body = order_results.get_json(order_id)
+            if body is None:
+                self.send_json(200, {"error": "Order not found"})
+            else:
+                self.send_body(200, body, "application/json")
+        elif url.path == "/order_status":
+            # Batch lookup: /order_status?ids=a,b,c[&wait=<ms>]
+            self.send_order_statuses(order_results, url.query, MAX_STATUS_IDS, LONG_POLL_MAX_MS)
+        elif url.path == "/metrics":
+            self.send_body(200, metrics.render(), "text/plain; version=0.0.4")
+        elif url.path == "/stream_orders":
+            if ORDER_DELIVERY == "queue":
+                self.send_json(409, {"error": "Streaming needs FX_ORDER_DELIVERY=stream or fanout"})
+            else:
+                self.stream_orders(url.query)
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_not_found()
+
+    def take_orders(self, query: str, max_n: int) -> Optional[List[Dict[str, Any]]]:
+        """Orders for one /get_order[s] poll, honouring ?wait=<ms>.
+
+        In fan-out mode the poll names its consumer (?consumer=ID) and reads
+        from that consumer's cursor. Returns None when an error response has
+        already been sent.
+        """
+        wait = self.query_int(query, "wait", 0, 0, LONG_POLL_MAX_MS) / 1000.0
+        if not FANOUT_DELIVERY:
+            orders = order_queue.get_many(max_n, wait)
+            if journal and orders:
+                journal.dequeued([o["order_id"] for o in orders])
+            return orders
+        consumer = parse_qs(query).get("consumer", [""])[0]
+        if not consumer:
+            self.send_json(400, {"error": "Missing consumer (fan-out mode)"})
+            return None
+        try:
+            orders, missed, released = order_stream.get_many(consumer, max_n, wait)
+        except KeyError:
+            self.send_json(404, {"error": "Unknown consumer"})
+            return None
+        if missed:
+            fanout_missed.inc(consumer, amount=missed)
+            order_log.warning("Consumer %s fell behind: %d orders skipped (%s)", consumer, missed, FANOUT_OVERFLOW)
+        if journal and released:
+            journal.dequeued([o["order_id"] for o in released])
+        return orders
+
+    def stream_orders(self, query: str):
+        """Push orders as they are enqueued over one chunked response.
+
+        Server-Sent Events by default ("id: <seq>", "event: order", "data:
+        <order JSON>"); ?format=ndjson sends {"seq":N,"order":{...}} lines.
+        The stream starts after ?last_ack=N if given (which also acks up to
+        N), else after the SSE Last-Event-ID header, else after the server's
+        acked position, so unacked orders are re-sent on reconnect. A "gap"
+        event reports orders that fell out of the buffer. Idle streams get a
+        comment/blank line every STREAM_HEARTBEAT_SECS. In fan-out mode this
+        is a read-only feed of the ring; queue mode has no stream (409).
+        """
+        params = parse_qs(query)
+        ndjson = params.get("format", [""])[0] == "ndjson"
+        after = order_stream.acked
+        try:
+            if "last_ack" in params:
+                after = int(params["last_ack"][0])
+                if STREAM_DELIVERY:
+                    self._acknowledge(after)
+            elif self.headers.get("Last-Event-ID"):
+                after = int(self.headers["Last-Event-ID"])
+        except ValueError:
+            self.send_json(400, {"error": "Invalid sequence number"})
+            return
+        self.close_connection = True  # The response only ends when the client leaves
+        self.start_chunked(200, "application/x-ndjson" if ndjson else "text/event-stream",
+                           {"Cache-Control": "no-cache"})
+        heartbeat = b"\n" if ndjson else b": keepalive\n\n"
+        try:
+            while True:
+                batch = order_stream.read_after(after, MAX_BATCH, STREAM_HEARTBEAT_SECS)
+                if not batch:
+                    self.write_chunk(heartbeat)
+                    continue
+                out = []
+                if batch[0][0] > after + 1:
+                    gap = {"from": after + 1, "to": batch[0][0] - 1}
+                    out.append(json_dumps({"gap": gap}) + b"\n" if ndjson else
+                               b"event: gap\ndata: " + json_dumps(gap) + b"\n\n")
+                for seq, order in batch:
+                    data = order_json(order)
+                    if ndjson:
+                        out.append(b'{"seq":%d,"order":%s}\n' % (seq, data))
+                    else:
+                        out.append(b"id: %d\nevent: order\ndata: %s\n\n" % (seq, data))
+                self.write_chunk(b"".join(out))
+                after = batch[-1][0]
+                if STREAM_DELIVERY and order_stream.mark_pushed(after):
+                    metrics.sent([o["order_id"] for _, o in batch])
+        except OSError:
+            pass  # Client went away; unacked orders are re-sent on reconnect
+
+    def _acknowledge(self, seq: int) -> int:
+        orders = order_stream.ack(seq)
+        if orders:
+            if journal:
+                journal.dequeued([o["order_id"] for o in orders])
+            order_log.info("Acked %d streamed orders up to seq %d", len(orders), order_stream.acked)
+        return len(orders)
 
     def do_POST(self):
         if self.path == "/submit_result":
             length = int(self.headers.get('Content-Length', '0'))
             body = self.rfile.read(length)
             try:
-                result = json.loads(body.decode('utf-8'))
+                result = json_loads(body)
             except json.JSONDecodeError:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "Invalid JSON"}).encode())
+                self.send_json(400, {"error": "Invalid JSON"})
                 return
 
             order_id = result.get("order_id")
             if not order_id:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "Missing order_id"}).encode())
+                self.send_json(400, {"error": "Missing order_id"})
                 return
 
-            order_results[order_id] = result
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "result received"}).encode())
+            pending = order_results.pending_record(order_id)
+            stored = order_results.set_result(order_id, result)
+            metrics.result(pending, time.monotonic())
+            if journal:
+                journal.result(order_id, stored)
+            self.send_json(200, {"status": "result received"})
+            order_log.info("Result for order %s", order_id, extra={"fields": stored})
+        elif self.path == "/order_status":
+            # Batch lookup for many IDs: {"ids": [...], "wait": <ms>}
+            length = int(self.headers.get('Content-Length', '0'))
+            self.send_order_statuses(order_results, "", MAX_STATUS_IDS, LONG_POLL_MAX_MS, self.rfile.read(length))
+        elif self.path == "/ack_orders":
+            # Cumulative ack for /stream_orders: {"seq": N} confirms every
+            # order up to N, which is then never re-sent
+            length = int(self.headers.get('Content-Length', '0'))
+            body = self.rfile.read(length)
+            if not STREAM_DELIVERY:
+                self.send_json(409, {"error": "Acks apply only with FX_ORDER_DELIVERY=stream"})
+                return
+            try:
+                seq = int(json_loads(body)["seq"])
+            except (ValueError, KeyError, TypeError):
+                self.send_json(400, {"error": "Expected {\"seq\": N}"})
+                return
+            count = self._acknowledge(seq)
+            self.send_json(200, {"acked": order_stream.acked, "count": count})
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_not_found()
 
 
 def start_server():
-    with socketserver.TCPServer(("", PORT), RequestHandler) as httpd:
-        print(f"Market server running on port {PORT}")
+    with PooledTCPServer(("", PORT), RequestHandler, HTTP_WORKERS, HTTP_BACKLOG) as httpd:
+        print(f"Market server running on port {PORT} ({HTTP_WORKERS} workers)")
         httpd.serve_forever()
 
 
+def replay_logs(paths: List[str], speed: float = 1.0, clients: int = 1, batch: int = 1,
+                fill_ms: float = 0.0, timeout: float = 60.0) -> None:
+    """Drive the order pipeline from historical logs against local stub EAs.
+
+    Alert lines are parsed and enqueued in file order, spaced by their log
+    time column divided by ``speed`` (1 = real time, 0 = as fast as
+    possible). A YYYYMMDD.log file's lines are placed on its date; lines
+    that go back in time within a file are due at once. ``clients`` StubEA threads (fxEaStub.py) poll a private
+    server on an ephemeral localhost port and fill every order. Prints a
+    throughput and latency report once every order is filled or
+    ``timeout`` seconds after the last line.
+    """
+    from fxEaStub import format_latency, start_clients
+
+    enqueued: Dict[str, float] = {}
+    received: List[float] = []
+    filled: List[float] = []
+    lock = threading.Lock()
+
+    def on_order(order, t):
+        t0 = enqueued.get(order.get("order_id"))
+        if t0 is not None:
+            with lock:
+                received.append(t - t0)
+
+    def on_fill(order, t):
+        t0 = enqueued.get(order.get("order_id"))
+        if t0 is not None:
+            with lock:
+                filled.append(t - t0)
+
+    httpd = PooledTCPServer(("127.0.0.1", 0), RequestHandler, HTTP_WORKERS, HTTP_BACKLOG)
+    threading.Thread(target=httpd.serve_forever, name="replay-http", daemon=True).start()
+    eas, stop, threads = start_clients(f"http://127.0.0.1:{httpd.server_address[1]}", clients, batch=batch,
+                                       fill_ms=fill_ms, on_order=on_order, on_fill=on_fill)
+    lines = signals = 0
+    late: List[float] = []
+    first_log = last_log = None
+    day = 0.0  # Start of the current file's day; other names keep the previous one
+    t_start = time.perf_counter()
+    for path in paths:
+        print(f"Replaying {path} (speed={'max' if speed <= 0 else f'{speed:g}x'})")
+        name = os.path.basename(path)
+        if sm.DAILY_LOG_RE.match(name):
+            day = datetime.strptime(name[:8], "%Y%m%d").timestamp()
+        for raw_line in sm.iter_file_once(path):
+            lines += 1
+            sig = sm.parse_signal(raw_line.split("\t"))
+            if not sig:
+                continue
+            signals += 1
+            stamp = log_seconds(sig.get("log_time") or "")
+            if stamp is not None:
+                stamp += day
+                if first_log is None:
+                    first_log = stamp
+                stamp = last_log = max(last_log or stamp, stamp)  # Out-of-order lines are due at once
+                if speed > 0:
+                    delay = t_start + (stamp - first_log) / speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    late.append(max(0.0, -delay))
+            order_id = sig["id"] = f"replay-{signals}"
+            enqueued[order_id] = time.perf_counter()
+            if enqueue_from_signal(sig, time.monotonic()) is None:
+                del enqueued[order_id]
+    t_fed = time.perf_counter()
+    deadline = t_fed + timeout
+    while sum(ea.fills for ea in eas) < len(enqueued) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - t_start
+    stop.set()
+    for t in threads:
+        t.join(timeout=5)
+    httpd.shutdown()
+    httpd.server_close()
+
+    fills = sum(ea.fills for ea in eas)
+    span = (last_log - first_log) if first_log is not None else 0.0
+    print(f"Replayed {lines} lines, {signals} alerts -> {len(enqueued)} orders, {fills} filled "
+          f"in {elapsed:.2f}s (log span {span:.1f}s, {span / elapsed if elapsed else 0:.1f}x), "
+          f"errors={sum(ea.errors for ea in eas)}")
+    print(f"throughput       {lines / max(t_fed - t_start, 1e-9):,.0f} lines/s read, "
+          f"{fills / max(elapsed, 1e-9):,.1f} orders/s filled")
+    if late:
+        print(format_latency("schedule lag", late))
+    print(format_latency("enqueue->EA", received))
+    print(format_latency("enqueue->fill", filled))
+    print(format_latency("poll", [x for ea in eas for x in ea.poll_latency]))
+    print(format_latency("submit_result", [x for ea in eas for x in ea.submit_latency]))
+
+
+def restore_journal():
+    n = journal.replay()
+    target = order_queue if ORDER_DELIVERY == "queue" else order_stream
+    for oid in journal.results:
+        order_index.claim(oid)
+    # Started first: re-queued orders that overflow the stream buffer are
+    # journaled as dropped, and appends wait for the writer
+    journal.start()
+    journal.restore_into(target, order_results)
+    print(f"Journal {JOURNAL_PATH}: replayed {n} records, {target.qsize()} orders re-queued")
+
+
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Tail MT5 terminal logs and serve the resulting market orders")
+    ap.add_argument("--replay", nargs="+", metavar="LOG",
+                    help="Replay historical logs (files, directories or globs) offline and report")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="Replay speed-up over the log's own timing; 0 = as fast as possible")
+    ap.add_argument("--clients", type=int, default=1, help="Stub EAs polling during a replay")
+    ap.add_argument("--batch", type=int, default=1, help="Orders per stub EA poll via /get_orders")
+    ap.add_argument("--fill-ms", type=float, default=0.0, help="Simulated execution time per order")
+    args = ap.parse_args()
+
+    setup_logging(LOG_LEVEL, LOG_FORMAT, ACCESS_LOG, LOG_QUEUE, LOG_RATE_BURST, LOG_RATE_SECS)
+    if args.replay:
+        if ORDER_DELIVERY != "queue":
+            raise SystemExit("--replay drives stub EAs through /get_order[s]; set FX_ORDER_DELIVERY=queue")
+        journal = None  # Replayed orders never reach the live journal
+        paths = [p for target in args.replay for p in sm.resolve_backfill_files(target)]
+        try:
+            replay_logs(paths, args.speed, args.clients, args.batch, args.fill_ms)
+        finally:
+            shutdown_logging()
+        raise SystemExit(0)
+    if journal:
+        restore_journal()
+
     # Start signal tailer thread
     t = threading.Thread(target=tail_log_and_enqueue, daemon=True)
     t.start()
@@ -399,3 +1083,5 @@ if __name__ == "__main__":
         start_server()
     except KeyboardInterrupt:
         print("Shutting down market server")
+    finally:
+        shutdown_logging()
@@ -0,0 +1,254 @@
+"""Minimal Prometheus-style metrics for fxServer.py and fxMarketServer.py.
+
+Counters, gauges and histograms with optional labels, rendered in the
+Prometheus text exposition format by ``Registry.render()``. Everything is
+thread-safe; observations are O(log buckets).
+"""
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fxLog import dropped as log_dropped
+
+# Seconds; spans sub-millisecond hand-offs up to minutes-long queue waits
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_num(v: float) -> str:
+    if v != v or v in (float("inf"), float("-inf")):
+        return {True: "NaN", False: "+Inf" if v > 0 else "-Inf"}[v != v]
+    if v == int(v) and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(tuple(str(v) for v in label_values), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labels:
+            items = [((), 0.0)]
+        return [f"{self.name}{_fmt_labels(self.labels, k)} {_fmt_num(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Gauge set explicitly, or sampled from ``func`` at render time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, func: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text)
+        self._func = func
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def value(self) -> float:
+        if self._func is not None:
+            return float(self._func())
+        with self._lock:
+            return self._value
+
+    def render(self) -> List[str]:
+        return [f"{self.name} {_fmt_num(self.value())}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        key = tuple(str(v) for v in label_values)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][idx] += 1
+            series[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            series = self._series.get(tuple(str(v) for v in label_values))
+            return sum(series[0]) if series else 0
+
+    def quantile(self, q: float, *label_values: str) -> float:
+        """Upper bucket bound below which a fraction ``q`` of samples fall."""
+        with self._lock:
+            series = self._series.get(tuple(str(v) for v in label_values))
+            counts = list(series[0]) if series else []
+        total = sum(counts)
+        if not total:
+            return 0.0
+        target, seen = q * total, 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._series.items())
+        out = []
+        for key, (counts, total) in items:
+            cum = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cum += n
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else bound)
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {cum}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_num(total)}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {cum}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def add(self, metric: _Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.add(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, func: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.add(Gauge(name, help_text, func))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.add(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.header())
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+def route_label(path: str, known: Iterable[str]) -> str:
+    """Map a request path to a bounded label: a known route, or "other".
+
+    Per-order paths such as /order_status/<id> collapse to their prefix.
+    """
+    path = path.split("?", 1)[0]
+    if path.startswith("/order_status/"):
+        path = "/order_status"
+    return path if path in known else "other"
+
+
+class OrderMetrics:
+    """Metrics shared by both servers: order stage latencies, lifecycle
+    counts, HTTP requests by route and code, queue depth and result store size.
+
+    Tailed alerts are timed through ``read_to_parsed`` (line read to
+    ``parse_signal`` done) and ``parsed_to_enqueued`` (dedup, journal commit
+    and queueing). Later stages come from the monotonic timestamps kept on
+    each ``PendingRecord``: ``queued`` (enqueue to handed to an EA),
+    ``sent_to_result`` (handed out to result posted) and ``end_to_end``
+    (origin, e.g. the log line being read, to result posted).
+    """
+
+    def __init__(self, order_queue, order_results, routes: Iterable[str]):
+        self.routes = frozenset(routes) | {"/metrics"}
+        self.order_results = order_results
+        self.registry = r = Registry()
+        self.stage = r.histogram("fx_order_stage_seconds", "Seconds spent between order lifecycle stages", ("stage",))
+        self.orders = r.counter("fx_orders_total", "Orders by lifecycle event", ("event",))
+        self.requests = r.counter("fx_http_requests_total", "HTTP requests by route and status code", ("path", "code"))
+        r.gauge("fx_order_queue_depth", "Orders waiting to be fetched by an EA", order_queue.qsize)
+        r.gauge("fx_order_results", "Order statuses held in the result store", lambda: len(order_results))
+        r.gauge("fx_order_results_evicted", "Statuses dropped because the store was full",
+                lambda: order_results.evicted)
+        r.gauge("fx_order_results_expired", "Statuses dropped after their TTL", lambda: order_results.expired)
+        r.gauge("fx_log_dropped", "Log records dropped because the log queue was full", log_dropped)
+
+    def request(self, path: str, code) -> None:
+        try:
+            code = int(code)
+        except (TypeError, ValueError):
+            pass
+        self.requests.inc(route_label(path, self.routes), code)
+
+    def parsed(self, read: float, now: float) -> None:
+        """A log line read at ``read`` was parsed into an alert at ``now``."""
+        self.stage.observe(now - read, "read_to_parsed")
+
+    def enqueued(self, parsed: Optional[float], now: float) -> None:
+        self.orders.inc("enqueued")
+        if parsed is not None:
+            self.stage.observe(now - parsed, "parsed_to_enqueued")
+
+    def sent(self, order_ids: Iterable[str]) -> None:
+        for oid in order_ids:
+            self.orders.inc("sent")
+            rec = self.order_results.mark_sent(oid)
+            if rec is not None:
+                self.stage.observe(rec.sent - rec.created, "queued")
+
+    def closed(self, order_ids: Iterable[str], status: str) -> None:
+        """Orders removed undelivered; ``status`` is "expired" or "dropped"."""
+        for _ in order_ids:
+            self.orders.inc(status)
+
+    def result(self, rec, now: float) -> None:
+        """Record a result for an order whose pending record was ``rec``."""
+        self.orders.inc("result")
+        if rec is None:
+            return
+        if rec.sent:
+            self.stage.observe(now - rec.sent, "sent_to_result")
+        self.stage.observe(now - rec.origin, "end_to_end")
+
+    def render(self) -> bytes:
+        return self.registry.render().encode()
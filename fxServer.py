@@ -1,147 +1,310 @@
-import http.server
-import socketserver
 import json
 import threading
-import queue
 import time
+from urllib.parse import urlsplit
+
+from fxCommon import (IdempotencyIndex, JsonRequestHandler, OrderIdGenerator, OrderQueue, PooledTCPServer,
+                      PreparedOrder, ResultStore, json_dumps, json_loads, order_json, orders_json)
+from fxJournal import OrderJournal
+from fxLog import access_log, order_log, setup_logging, shutdown_logging
+from fxMetrics import OrderMetrics
 
 # Configuration
 PORT = 12300  # Server port, matching your setup at 192.168.1.8:3000
-order_queue = queue.Queue()  # Queue to hold pending orders for MT5
-order_results = {}  # Dictionary to store order results by order_id
+LONG_POLL_MAX_MS = 30000  # Upper bound for /get_order?wait=<ms> long-polls
+MAX_BATCH = 100  # Cap on orders returned by one /get_orders?max=N call
+MAX_STATUS_IDS = 1000  # Most order IDs looked up by one batch /order_status request
+MAX_ORDER_LINE = 65536  # Longest accepted line in an NDJSON /place_order upload (bytes)
+BULK_RESULT_BUFFER = 1000  # NDJSON upload result lines held before the reply starts streaming
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson")  # Content-Types for streaming /place_order
+HTTP_WORKERS = 32  # Requests served concurrently by the worker pool
+HTTP_BACKLOG = 128  # Connections allowed to wait for a free worker
+KEEPALIVE_IDLE_SECS = 15  # Idle seconds before a keep-alive connection is closed
+LOG_LEVEL = "INFO"  # DEBUG also logs every request line and empty poll
+LOG_FORMAT = "text"  # "text" or "json" (one object per line)
+ACCESS_LOG = True  # Per-request access lines; False turns them off entirely
+ORDER_TTL_SECS = 0  # Default seconds an order stays executable when it has no expires_at/ttl_secs (0 = never)
+QUEUE_NEWEST_FIRST = False  # Within a priority, serve the newest order first instead of the oldest
+order_queue = OrderQueue(QUEUE_NEWEST_FIRST)  # Pending orders for MT5, highest priority first
+RESULTS_MAX = 100000  # Most order statuses kept; oldest are evicted first
+RESULTS_TTL_SECS = 86400  # Seconds an order status is kept
+order_results = ResultStore(RESULTS_MAX, RESULTS_TTL_SECS)  # Order results by order_id
+order_ids = OrderIdGenerator()  # Unique IDs for orders submitted without one
+order_index = IdempotencyIndex(RESULTS_MAX, RESULTS_TTL_SECS)  # Accepted order_ids, to ignore resubmissions
+JOURNAL_PATH = ""  # Durable order journal, e.g. "fx_server_journal.ndjson" ("" disables)
+JOURNAL_COMPACT_EVERY = 10000  # Rewrite the journal to live state after this many commits
+journal = OrderJournal(JOURNAL_PATH, compact_every=JOURNAL_COMPACT_EVERY, results_max=RESULTS_MAX) if JOURNAL_PATH else None
+# Prometheus metrics served at GET /metrics
+metrics = OrderMetrics(order_queue, order_results,
+                       ("/place_order", "/submit_result", "/get_order", "/get_orders", "/order_status"))
+
+# Record orders the queue dropped unsent because their expires_at passed
+def expire_orders(orders):
+    ids = [o["order_id"] for o in orders]
+    for oid in ids:
+        order_results.set_closed(oid, "expired")
+    if journal:
+        journal.closed(ids, "expired")
+    metrics.closed(ids, "expired")
+    order_log.warning("Dropped %d expired orders", len(ids), extra={"fields": {"order_ids": ids}})
+
+order_queue.on_expired = expire_orders
+
+# Validate one submitted order and queue it; returns (order_id, queued).
+# queued is False for an order_id that was already submitted. Raises
+# ValueError with the client-facing reason for an invalid order.
+def submit_order(order):
+    if not isinstance(order, dict):
+        raise ValueError("Order must be a JSON object")
+    # Required fields for each order (allow ATR mode without sl/tp)
+    if not all(field in order for field in ("symbol", "order_type", "volume", "price")):
+        raise ValueError("Missing required fields in order")
+    # If ATR mode is requested, allow sl/tp omission; EA will compute
+    if str(order.get("sl_tp_mode", "")).upper() != "ATR":
+        if "sl" not in order or "tp" not in order:
+            raise ValueError("Missing sl/tp; or set sl_tp_mode=ATR")
+    # Optional scheduling: priority (higher first) and expires_at (Unix
+    # seconds) or ttl_secs; expired orders are never sent
+    try:
+        if order.get("priority") is not None:
+            order["priority"] = float(order["priority"])
+        if order.get("ttl_secs") is not None:
+            order["expires_at"] = time.time() + float(order.pop("ttl_secs"))
+        elif order.get("expires_at") is not None:
+            order["expires_at"] = float(order["expires_at"])
+        elif ORDER_TTL_SECS > 0:
+            order["expires_at"] = time.time() + ORDER_TTL_SECS
+    except (TypeError, ValueError):
+        raise ValueError("priority, expires_at and ttl_secs must be numbers") from None
+
+    # Assign order ID if not provided; a resubmitted client ID is not queued
+    # again, while a generated one skips IDs clients have already used
+    if order.get("order_id"):
+        order_id = str(order["order_id"])
+        if not order_index.claim(order_id):
+            order_log.info("Order %s already submitted; not queued again", order_id)
+            return order_id, False
+    else:
+        order_id = order_ids.claim_new(order_index)
+    order["order_id"] = order_id
+    # Ensure comment and magic_number are included
+    order["comment"] = order.get("comment", "API Order")
+    order["magic_number"] = order.get("magic_number", 123456)
+    order = PreparedOrder(order)  # Serialized once, reused by every send
+    if journal:
+        journal.enqueued(order)
+    order_results.add_pending(order_id)
+    order_queue.put(order)
+    metrics.enqueued(None, time.monotonic())
+    order_log.info("Order queued: %s", order_id, extra={"fields": order})
+    return order_id, True
 
 # HTTP request handler for API endpoints
-class RequestHandler(http.server.BaseHTTPRequestHandler):
+class RequestHandler(JsonRequestHandler):
+    timeout = KEEPALIVE_IDLE_SECS  # Close idle keep-alive connections
+
     # Log incoming requests with method, path, and client IP
     def log_request(self, code='-', size='-'):
-        print(f"Request: {self.requestline}, Code: {code}, Client: {self.client_address}")
+        metrics.request(self.path, code)
+        access_log.info("%s \"%s\" %s", self.client_address[0], self.requestline, code)
 
     # Handle POST requests (/place_order, /submit_result)
     def do_POST(self):
-        print(f"POST request received: {self.path} from {self.client_address}")
-        if self.path == "/place_order":
+        access_log.debug("POST request received: %s from %s", self.path, self.client_address[0])
+        url = urlsplit(self.path)
+        if url.path == "/place_order" and (self.headers.get("Content-Type", "").split(";")[0].strip() in NDJSON_TYPES
+                                           or "format=ndjson" in url.query):
+            self.place_orders_stream()
+        elif url.path == "/place_order":
             # Process new order submission from client
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             try:
-                order_data = json.loads(post_data.decode('utf-8'))
+                order_data = json_loads(post_data)
                 # Support both single order (dict) and array of orders (list)
                 orders = order_data if isinstance(order_data, list) else [order_data]
-                
-                # Required fields for each order (allow ATR mode without sl/tp)
-                required_fields = ["symbol", "order_type", "volume", "price"]
-                order_ids = []
-                
+                submitted_ids = []
+                duplicate_ids = []
+
                 for order in orders:
-                    if not all(field in order for field in required_fields):
-                        self.send_response(400)
-                        self.send_header("Content-Type", "application/json")
-                        self.end_headers()
-                        self.wfile.write(json.dumps({"error": "Missing required fields in order"}).encode())
-                        print(f"Missing required fields in order: {order}")
+                    try:
+                        order_id, queued = submit_order(order)
+                    except ValueError as e:
+                        self.send_json(400, {"error": str(e)})
+                        order_log.warning("%s: %s", e, order)
                         return
-                    # If ATR mode is requested, allow sl/tp omission; EA will compute
-                    sltp_mode = str(order.get("sl_tp_mode", "")).upper()
-                    if sltp_mode != "ATR":
-                        if "sl" not in order or "tp" not in order:
-                            self.send_response(400)
-                            self.send_header("Content-Type", "application/json")
-                            self.end_headers()
-                            self.wfile.write(json.dumps({"error": "Missing sl/tp; or set sl_tp_mode=ATR"}).encode())
-                            print(f"Missing sl/tp for non-ATR order: {order}")
-                            return
-                    
-                    # Assign order ID if not provided
-                    order_id = order.get("order_id", str(int(time.time() * 1000)))
-                    order["order_id"] = order_id
-                    # Ensure comment and magic_number are included
-                    order["comment"] = order.get("comment", "API Order")
-                    order["magic_number"] = order.get("magic_number", 123456)
-                    order_queue.put(order)
-                    order_results[order_id] = {"status": "pending"}
-                    order_ids.append(order_id)
-                    print(f"Order queued: {order}")
-
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"status": "orders submitted", "order_ids": order_ids}).encode())
+                    submitted_ids.append(order_id)
+                    if not queued:
+                        duplicate_ids.append(order_id)
+
+                response = {"status": "orders submitted", "order_ids": submitted_ids}
+                if duplicate_ids:
+                    response["duplicate_ids"] = duplicate_ids
+                self.send_json(200, response)
             except json.JSONDecodeError:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "Invalid JSON"}).encode())
-                print("Invalid JSON")
+                self.send_json(400, {"error": "Invalid JSON"})
+                order_log.warning("Invalid JSON in /place_order")
 
-        elif self.path == "/submit_result":
+        elif url.path == "/submit_result":
             # Process order result from MT5
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             try:
-                result_data = json.loads(post_data.decode('utf-8'))
+                result_data = json_loads(post_data)
                 order_id = result_data.get("order_id")
                 if not order_id:
-                    self.send_response(400)
-                    self.send_header("Content-Type", "application/json")
-                    self.end_headers()
-                    self.wfile.write(json.dumps({"error": "Missing order_id"}).encode())
-                    print("Missing order_id")
+                    self.send_json(400, {"error": "Missing order_id"})
+                    order_log.warning("Result without order_id: %s", result_data)
                     return
                 
-                order_results[order_id] = result_data
-                print(f"Received order result from MT5: {result_data}")
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"status": "result received"}).encode())
+                pending = order_results.pending_record(order_id)
+                stored = order_results.set_result(order_id, result_data)
+                metrics.result(pending, time.monotonic())
+                if journal:
+                    journal.result(order_id, stored)
+                order_log.info("Received order result from MT5: %s", order_id, extra={"fields": stored})
+                self.send_json(200, {"status": "result received"})
             except json.JSONDecodeError:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "Invalid JSON"}).encode())
-                print("Invalid JSON")
+                self.send_json(400, {"error": "Invalid JSON"})
+                order_log.warning("Invalid JSON in /submit_result")
+        elif url.path == "/order_status":
+            # Batch status for many orders: {"ids": [...], "wait": <ms>}
+            content_length = int(self.headers.get('Content-Length', '0'))
+            self.send_order_statuses(order_results, "", MAX_STATUS_IDS, LONG_POLL_MAX_MS,
+                                     self.rfile.read(content_length))
         else:
-            self.send_response(404)
-            self.end_headers()
-            print("404 Not Found")
+            self.send_not_found()
+
+    # Bulk NDJSON upload: one order per line, Content-Length or chunked.
+    # Each line is parsed, validated and queued as it arrives, so the body is
+    # never held in memory; a bad line is reported and the rest still go in.
+    # The reply is NDJSON too: one {"line","status","order_id"|"error"} per
+    # non-blank input line, then a {"summary": {...}} line. Up to
+    # BULK_RESULT_BUFFER lines are held until the upload ends, so a small
+    # upload written before reading gets its whole reply afterwards; past
+    # that they are streamed while the upload continues (the client must
+    # read concurrently). A body cut short or with broken chunk framing ends
+    # the reply with {"error", "summary"} and closes the connection.
+    def place_orders_stream(self):
+        buf = []
+        started = False
+        counts = {"queued": 0, "duplicate": 0, "error": 0}
+        try:
+            for lineno, line in enumerate(self.iter_body_lines(MAX_ORDER_LINE), 1):
+                if line is None:
+                    status, key, detail = "error", "error", f"Line longer than {MAX_ORDER_LINE} bytes"
+                elif not line.strip():
+                    continue
+                else:
+                    try:
+                        detail, queued = submit_order(json_loads(line))
+                        status, key = ("queued" if queued else "duplicate"), "order_id"
+                    except json.JSONDecodeError:
+                        status, key, detail = "error", "error", "Invalid JSON"
+                    except ValueError as e:
+                        status, key, detail = "error", "error", str(e)
+                counts[status] += 1
+                buf.append(json_dumps({"line": lineno, "status": status, key: detail}) + b"\n")
+                if len(buf) >= BULK_RESULT_BUFFER:
+                    if not started:
+                        self.start_chunked(200, "application/x-ndjson")
+                        started = True
+                    self.write_chunk(b"".join(buf))
+                    buf = []
+        except ValueError as e:
+            # Truncated body or broken chunk framing; the stream position is lost
+            self.close_connection = True
+            order_log.warning("Bulk upload aborted after %d lines: %s", sum(counts.values()), e)
+            if not started:
+                self.send_json(400, {"error": f"Malformed body: {e}", "summary": counts})
+                return
+            buf.append(json_dumps({"error": f"Malformed body: {e}", "summary": counts}) + b"\n")
+            self.write_chunk(b"".join(buf))
+            self.end_chunked()
+            return
+        except OSError as e:
+            # Socket timeout or reset: no reply can be delivered reliably
+            self.close_connection = True
+            order_log.warning("Bulk upload connection lost after %d lines (%s): %s",
+                              sum(counts.values()), counts, e)
+            return
+        if counts["error"]:
+            order_log.warning("Bulk upload: %d of %d lines rejected", counts["error"], sum(counts.values()))
+        if not started:
+            self.start_chunked(200, "application/x-ndjson")
+        buf.append(json_dumps({"summary": counts}) + b"\n")
+        self.write_chunk(b"".join(buf))
+        self.end_chunked()
 
-    # Handle GET requests (/get_order, /order_status/)
+    # Handle GET requests (/get_order, /get_orders, /order_status/, /metrics)
     def do_GET(self):
-        print(f"GET request received: {self.path} from {self.client_address}")
-        if self.path == "/get_order":
-            # Send next order to MT5
-            try:
-                order = order_queue.get_nowait()
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps(order, separators=(',', ':')).encode())
-                print(f"Sent order to MT5: {order}")
-            except queue.Empty:
-                self.send_response(204)
-                self.end_headers()
-                print("No orders available (204)")
-        elif self.path.startswith("/order_status/"):
-            # Return status for a specific order_id
-            order_id = self.path.split("/")[-1]
-            result = order_results.get(order_id, {"error": "Order not found"})
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps(result, separators=(',', ':')).encode())
-            print(f"Sent order status for {order_id}: {result}")
+        access_log.debug("GET request received: %s from %s", self.path, self.client_address[0])
+        url = urlsplit(self.path)
+        if url.path == "/get_order":
+            # Send next order to MT5; ?wait=<ms> long-polls until one arrives
+            wait_ms = self.query_int(url.query, "wait", 0, 0, LONG_POLL_MAX_MS)
+            order = order_queue.get(wait_ms / 1000.0)
+            if order is None:
+                self.send_empty(204)
+                order_log.debug("No orders available (204)")
+                return
+            if journal:
+                journal.dequeued([order["order_id"]])
+            metrics.sent([order["order_id"]])
+            self.send_body(200, order_json(order), "application/json")
+            order_log.info("Sent order to MT5: %s", order["order_id"], extra={"fields": order})
+        elif url.path == "/get_orders":
+            # Send up to ?max=N queued orders as one JSON array (atomic batch)
+            max_n = self.query_int(url.query, "max", MAX_BATCH, 1, MAX_BATCH)
+            wait_ms = self.query_int(url.query, "wait", 0, 0, LONG_POLL_MAX_MS)
+            orders = order_queue.get_many(max_n, wait_ms / 1000.0)
+            if not orders:
+                self.send_empty(204)
+                order_log.debug("No orders available (204)")
+                return
+            if journal:
+                journal.dequeued([o["order_id"] for o in orders])
+            metrics.sent([o["order_id"] for o in orders])
+            self.send_body(200, orders_json(orders), "application/json")
+            order_log.info("Sent %d orders to MT5", len(orders),
+                           extra={"fields": {"order_ids": [o["order_id"] for o in orders]}})
+        elif url.path.startswith("/order_status/"):
+            # Return status for a specific order_id; ?wait=<ms> holds the
+            # reply until the EA has reported on it
+            order_id = url.path.split("/")[-1]
+            wait_ms = self.query_int(url.query, "wait", 0, 0, LONG_POLL_MAX_MS)
+            order_results.wait_any([order_id], wait_ms / 1000.0)
+            body = order_results.get_json(order_id)
+            if body is None:
+                self.send_json(200, {"error": "Order not found"})
+            else:
+                self.send_body(200, body, "application/json")
+            order_log.debug("Sent order status for %s: %s", order_id, body)
+        elif url.path == "/order_status":
+            # Batch status: ?ids=a,b,c[&wait=<ms>] replies once any is settled
+            self.send_order_statuses(order_results, url.query, MAX_STATUS_IDS, LONG_POLL_MAX_MS)
+        elif url.path == "/metrics":
+            # Prometheus scrape: stage latencies, queue depth, request counts
+            self.send_body(200, metrics.render(), "text/plain; version=0.0.4")
         else:
-            self.send_response(404)
-            self.end_headers()
-            print("404 Not Found")
+            self.send_not_found()
 
 # Start the HTTP server in a separate thread
 def start_server():
-    with socketserver.TCPServer(("", PORT), RequestHandler) as httpd:
-        print(f"Server running on port {PORT}")
+    with PooledTCPServer(("", PORT), RequestHandler, HTTP_WORKERS, HTTP_BACKLOG) as httpd:
+        print(f"Server running on port {PORT} ({HTTP_WORKERS} workers)")
         httpd.serve_forever()
 
 if __name__ == "__main__":
+    setup_logging(LOG_LEVEL, LOG_FORMAT, ACCESS_LOG)
+    # Rebuild queue and results from the journal before accepting requests
+    if journal:
+        replayed = journal.replay()
+        journal.restore_into(order_queue, order_results)
+        for oid in journal.results:
+            order_index.claim(oid)
+        journal.start()
+        print(f"Journal {JOURNAL_PATH}: replayed {replayed} records, {order_queue.qsize()} orders re-queued")
     server_thread = threading.Thread(target=start_server, daemon=True)
     server_thread.start()
     try:
@@ -149,3 +312,5 @@ if __name__ == "__main__":
             time.sleep(1)
     except KeyboardInterrupt:
         print("Shutting down server")
+    finally:
+        shutdown_logging()
@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 import argparse
+import codecs
+import glob
+import hashlib
 import io
 import json
 import os
 import re
+import select
 import sys
 import time
-from typing import Optional, Dict, Any, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, Iterable, List, Set
 try:
-    # Windows-specific shared read helpers
     import ctypes  # type: ignore
-    import msvcrt  # type: ignore
+    import ctypes.util  # type: ignore
 except Exception:
     ctypes = None  # type: ignore
+try:
+    # Windows-specific shared read helpers
+    import msvcrt  # type: ignore
+except Exception:
     msvcrt = None  # type: ignore
 
 
@@ -36,6 +44,20 @@ SRC_CTX_COMMA_RE = re.compile(r"^(?P<src>.+?)\s+(?P<symbol>[A-Z0-9]+),(?P<tf>[A-
 # Time column detector (e.g., 23:45:01.244 or 04:10:00)
 TIME_RE = re.compile(r"^\d{1,2}:\d{2}:\d{2}(?:\.\d+)?$")
 
+# Both alert formats in one pattern; the matching branch decides the type
+ALERT_RE = re.compile(
+    r"^Alert:\s+(?:"
+    r"(?P<a_side>Buy|Sell)\s+Arrow\s+(?P<a_symbol>[A-Z0-9]+)\s+(?P<a_tf>[A-Z]\d+)\s+(?P<a_time>\d{1,2}:\d{2})"
+    r"|Dark Point\s+(?P<d_symbol>[A-Z0-9]+)\s+(?P<d_tf>[A-Z]\d+)\s+"
+    r"(?P<d_date>\d{4}\.\d{2}\.\d{2})\s+(?P<d_time>\d{1,2}:\d{2})\s+"
+    r"(?P<d_side>Buy|Sell)\s+Entry\s+at:\s+(?P<d_price>[0-9]+(?:\.[0-9]+)?)"
+    r")\s*$",
+    re.IGNORECASE,
+)
+
+# 3-column layout: "<src>: Alert: ..." combined in the last column
+COMBINED_MSG_RE = re.compile(r"^(?P<src>.+?):\s*(?P<msg>Alert:.*)$")
+
 
 def parse_signal(fields: Iterable[str]) -> Optional[Dict[str, Any]]:
     """Parse a tab-separated log line into a signal dict, tolerant to layout.
@@ -43,8 +65,11 @@ def parse_signal(fields: Iterable[str]) -> Optional[Dict[str, Any]]:
     Supports both of these examples by inferring fields from the end:
     - "0\tOK\t04:10:00.966\tDark Bands MT5 (BTCUSD,M5)\tAlert: Buy Arrow  XAUUSD M5 23:05"
     - "0\t23:45:01.244\tDark Bands MT5 (BTCUSD,M1)\tAlert: Sell Arrow  BTCUSD M1 18:44"
+
+    Non-alert lines are rejected with a prefix/substring check before any
+    regex runs; time and source columns are only examined for alerts.
     """
-    cols = [c for c in fields]
+    cols = fields if isinstance(fields, list) else list(fields)
     if len(cols) < 3:
         return None
 
@@ -53,79 +78,61 @@ def parse_signal(fields: Iterable[str]) -> Optional[Dict[str, Any]]:
     message = cols[-1]
     src_ctx = ""
     if len(cols) >= 4:
+        if message[:6].lower() != "alert:":
+            return None
         src_ctx = cols[-2]
-        # message remains cols[-1]
-    else:
+    elif "Alert:" in message:
         # Try to split combined last column into "src : Alert: ..."
-        m_comb = re.match(r"^(?P<src>.+?):\s*(?P<msg>Alert:.*)$", message)
+        m_comb = COMBINED_MSG_RE.match(message)
         if m_comb:
             src_ctx = m_comb.group("src").strip()
             message = m_comb.group("msg").strip()
+    elif message[:6].lower() != "alert:":
+        return None
+
+    m = ALERT_RE.match(message)
+    if not m:
+        return None
 
     # Find a time-like column earlier (ignore the first arbitrary token/word)
     log_time = ""
-    limit = -2 if len(cols) >= 4 else -1
-    scan_cols = cols[:limit] if limit != 0 else []
+    scan_cols = cols[:-2] if len(cols) >= 4 else cols[:-1]
     for c in scan_cols:
-        if TIME_RE.match(c.strip()):
-            log_time = c.strip()
+        c = c.strip()
+        if TIME_RE.match(c):
+            log_time = c
             break
 
     # Extract helpful context from source column
     src_name = None
-    src_symbol = None
-    src_tf = None
-    m = SRC_CTX_RE.match(src_ctx)
-    if m:
-        src_name = m.group("src").strip()
-        src_symbol = m.group("symbol").upper()
-        src_tf = m.group("tf").upper()
-    else:
-        m2 = SRC_CTX_COMMA_RE.match(src_ctx)
-        if m2:
-            src_name = m2.group("src").strip()
-            src_symbol = m2.group("symbol").upper()
-            src_tf = m2.group("tf").upper()
-
-    # Try known message formats
-    m = ARROW_RE.match(message)
-    if m:
-        side = m.group("side").lower()
-        symbol = m.group("symbol").upper()
-        tf = m.group("tf").upper()
-        sig_time = m.group("sig_time")
-        return {
-            "type": "arrow",
-            "side": side,
-            "symbol": symbol,
-            "timeframe": tf,
-            "signal_time": sig_time,
-            "log_time": log_time,
-            "source": src_name or "",
-        }
+    m_src = SRC_CTX_RE.match(src_ctx) or SRC_CTX_COMMA_RE.match(src_ctx)
+    if m_src:
+        src_name = m_src.group("src").strip()
 
-    m = DARK_POINT_RE.match(message)
-    if m:
-        side = m.group("side").lower()
-        symbol = m.group("symbol").upper()
-        tf = m.group("tf").upper()
-        sig_date = m.group("sig_date")
-        sig_time = m.group("sig_time")
-        price = float(m.group("price"))
-        # Convert date from YYYY.MM.DD to YYYY-MM-DD for ISO friendliness
-        iso_date = sig_date.replace(".", "-")
+    side = m.group("a_side")
+    if side is not None:
         return {
-            "type": "dark_point",
-            "side": side,
-            "symbol": symbol,
-            "timeframe": tf,
-            "signal_datetime": f"{iso_date} {sig_time}",
-            "entry_price": price,
+            "type": "arrow",
+            "side": side.lower(),
+            "symbol": m.group("a_symbol").upper(),
+            "timeframe": m.group("a_tf").upper(),
+            "signal_time": m.group("a_time"),
             "log_time": log_time,
             "source": src_name or "",
         }
 
-    return None
+    # Convert date from YYYY.MM.DD to YYYY-MM-DD for ISO friendliness
+    iso_date = m.group("d_date").replace(".", "-")
+    return {
+        "type": "dark_point",
+        "side": m.group("d_side").lower(),
+        "symbol": m.group("d_symbol").upper(),
+        "timeframe": m.group("d_tf").upper(),
+        "signal_datetime": f"{iso_date} {m.group('d_time')}",
+        "entry_price": float(m.group("d_price")),
+        "log_time": log_time,
+        "source": src_name or "",
+    }
 
 
 def emit_json(obj: Dict[str, Any], out_fp: Optional[io.TextIOBase]):
@@ -138,11 +145,19 @@ def emit_json(obj: Dict[str, Any], out_fp: Optional[io.TextIOBase]):
 
 
 LOG_ENCODING = os.environ.get('FX_LOG_ENCODING', '').strip() or None
+# Change-notification backend for tailers: auto, inotify, win32 or poll
+TAIL_WATCH = os.environ.get('FX_TAIL_WATCH', 'auto').strip().lower() or 'auto'
+# Sleep between reads when polling (also the fallback backend)
+TAIL_POLL_SECS = float(os.environ.get('FX_TAIL_POLL_SECS', '0.2'))
+# Safety re-check interval for event backends, in case a notification is missed
+TAIL_WATCH_TIMEOUT_SECS = float(os.environ.get('FX_TAIL_WATCH_TIMEOUT_SECS', '2.0'))
 
 
-def _open_shared_text(path: str):
-    """Open file for shared reading on Windows with selectable encoding.
-    Encoding order: explicit FX_LOG_ENCODING, else 'utf-16' on Windows, else 'utf-16-le'.
+def _open_shared_raw(path: str):
+    """Open a log for unbuffered binary reading without locking out the writer.
+
+    On Windows uses CreateFileW with FILE_SHARE_READ|WRITE|DELETE; elsewhere a
+    plain open() already shares.
     """
     if os.name == 'nt' and ctypes is not None and msvcrt is not None:
         # CreateFileW with FILE_SHARE_READ|WRITE|DELETE to avoid lock issues
@@ -165,56 +180,422 @@ def _open_shared_text(path: str):
         if handle == INVALID_HANDLE_VALUE:
             raise FileNotFoundError(path)
         fd = msvcrt.open_osfhandle(int(handle), os.O_RDONLY)
-        raw = os.fdopen(fd, 'rb', buffering=0)
-        enc = LOG_ENCODING or 'utf-16'
-        text = io.TextIOWrapper(raw, encoding=enc, errors="ignore")
-        return raw, text
+        return os.fdopen(fd, 'rb', buffering=0)
     # POSIX or fallback
-    raw = open(path, "rb", buffering=0)
-    enc = LOG_ENCODING or 'utf-16-le'
+    return open(path, "rb", buffering=0)
+
+
+def _open_shared_text(path: str):
+    """Open file for shared reading on Windows with selectable encoding.
+    Encoding order: explicit FX_LOG_ENCODING, else 'utf-16' on Windows, else 'utf-16-le'.
+    """
+    raw = _open_shared_raw(path)
+    enc = LOG_ENCODING or ('utf-16' if os.name == 'nt' else 'utf-16-le')
     return raw, io.TextIOWrapper(raw, encoding=enc, errors="ignore")
 
 
+# Bytes requested per read() by LogReader
+READ_CHUNK_BYTES = int(os.environ.get('FX_READ_CHUNK_BYTES', str(1 << 18)))
+
+_BOMS = (
+    (b'\xef\xbb\xbf', 'utf-8'),
+    (b'\xff\xfe', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16-be'),
+)
+
+
+def _detect_encoding(head: bytes, fallback: Optional[str]):
+    """Return (encoding, bom_length) for a file starting with ``head``.
+
+    A BOM wins; otherwise FX_LOG_ENCODING/``fallback``; otherwise guess from
+    NUL bytes (MT terminal logs are UTF-16-LE). Endianness-neutral names are
+    pinned to LE because chunks are decoded mid-file without a BOM.
+    """
+    for bom, enc in _BOMS:
+        if head.startswith(bom):
+            return enc, len(bom)
+    enc = fallback
+    if not enc:
+        if len(head) >= 2 and head[0] == 0 and head[1] != 0:
+            enc = 'utf-16-be'
+        elif len(head) >= 2 and head[1] == 0 or not head:
+            enc = 'utf-16-le'
+        else:
+            enc = 'utf-8'
+    norm = enc.lower().replace('_', '-')
+    if norm in ('utf-16', 'utf16'):
+        enc = 'utf-16-le'
+    elif norm in ('utf-8-sig', 'utf8-sig', 'utf8sig'):
+        enc = 'utf-8'
+    return enc, 0
+
+
+class LogReader:
+    """Block-reading line reader for an append-only log.
+
+    Reads ``READ_CHUNK_BYTES`` at a time, splits on newline code units at the
+    byte level (so a line, or a UTF-16 character, cut by a chunk boundary is
+    carried over to the next read) and decodes all complete lines of a chunk
+    in one call. ``offset`` is the byte position just past the last complete
+    line returned, independent of any text-layer buffering.
+    """
+
+    def __init__(self, raw, encoding: Optional[str] = None, chunk_size: int = READ_CHUNK_BYTES):
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self._fallback = encoding
+        raw.seek(0)
+        head = raw.read(4)
+        # An empty file is sniffed again once its first bytes arrive
+        self._sniffed = len(head) >= 4
+        self._set_encoding(*_detect_encoding(head, encoding))
+        self._buf = b''
+        self.offset = 0
+        # Raw bytes (with newline) of the last complete line returned
+        self.last_line = b''
+        self.seek(self.bom_len)
+
+    def _set_encoding(self, encoding: str, bom_len: int) -> None:
+        self.encoding, self.bom_len = encoding, bom_len
+        if encoding == 'utf-16-le':
+            self._nl, self._width = b'\n\x00', 2
+        elif encoding == 'utf-16-be':
+            self._nl, self._width = b'\x00\n', 2
+        else:
+            self._nl, self._width = b'\n', 1
+        # Universal newlines, as TextIOWrapper did; blocks always end on a
+        # newline so no decoder state carries between them
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(errors='ignore'), translate=True)
+
+    def seek(self, offset: int) -> None:
+        """Resume reading at byte ``offset`` (aligned to a code unit, past the BOM)."""
+        offset = max(offset, self.bom_len)
+        offset -= (offset - self.bom_len) % self._width
+        self.raw.seek(offset)
+        self.offset = offset
+        self._buf = b''
+
+    def seek_end(self) -> None:
+        self.seek(self.size())
+
+    def size(self) -> int:
+        return os.fstat(self.raw.fileno()).st_size
+
+    def read_lines(self) -> list:
+        """Return the complete lines from one chunk read ([] when nothing new)."""
+        data = self.raw.read(self.chunk_size)
+        if not data:
+            return []
+        buf = self._buf + data if self._buf else data
+        if not self._sniffed:
+            # ``buf`` starts at ``offset``, which may already be past a BOM
+            head = self.read_at(0, 4)
+            if len(head) < 4:
+                self._buf = buf
+                return []
+            self._sniffed = True
+            self._set_encoding(*_detect_encoding(head, self._fallback))
+            if self.offset < self.bom_len:
+                buf = buf[self.bom_len - self.offset:]
+                self.offset = self.bom_len
+        end = self._complete_end(buf)
+        if end == 0:
+            self._buf = buf
+            return []
+        self._buf = buf[end:]
+        self.offset += end
+        self.last_line = buf[self._complete_end(buf, end - self._width):end]
+        lines = self._decoder.decode(buf[:end], final=True).split('\n')
+        lines.pop()  # empty tail after the final newline
+        return lines
+
+    def pending_bytes(self) -> int:
+        """Bytes read past ``offset`` that do not yet form a complete line."""
+        return len(self._buf)
+
+    def read_partial(self) -> str:
+        """Consume and return a trailing line that has no newline yet."""
+        buf, self._buf = self._buf, b''
+        self.offset += len(buf)
+        return self._decoder.decode(buf, final=True).rstrip('\n')
+
+    def _complete_end(self, buf: bytes, stop: Optional[int] = None) -> int:
+        # End of the last newline before ``stop`` that starts on a code-unit boundary
+        idx = buf.rfind(self._nl, 0, len(buf) if stop is None else stop)
+        while idx > 0 and idx % self._width:
+            idx = buf.rfind(self._nl, 0, idx + 1)
+        return idx + self._width if idx >= 0 else 0
+
+    def identity(self):
+        """(st_dev, st_ino) of the open file, to recognise it after a restart."""
+        st = os.fstat(self.raw.fileno())
+        return st.st_dev, st.st_ino
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        """Read ``length`` bytes at ``offset`` without disturbing the tail position."""
+        pos = self.raw.tell()
+        try:
+            self.raw.seek(offset)
+            return self.raw.read(length)
+        finally:
+            self.raw.seek(pos)
+
+    def close(self) -> None:
+        try:
+            self.raw.close()
+        except Exception:
+            pass
+
+
+def open_log_reader(path: str, from_beginning: bool = False,
+                    encoding: Optional[str] = None) -> LogReader:
+    """Shared-open ``path`` and return a LogReader at its start or end.
+
+    ``encoding`` (default FX_LOG_ENCODING) only applies to files without a BOM.
+    """
+    reader = LogReader(_open_shared_raw(path), encoding or LOG_ENCODING)
+    if not from_beginning:
+        reader.seek_end()
+    return reader
+
+
+class TailCheckpoint:
+    """Persists tail positions so a restarted tailer resumes at the exact byte.
+
+    The checkpoint file is a JSON object mapping a source key to the file path,
+    its (dev, ino) identity, the byte offset after the last consumed line and
+    the length and SHA-1 of that line. Writes are atomic (temp file + rename)
+    and rate-limited to one per ``interval`` seconds while lines stream in;
+    ``flush()`` forces a pending write, e.g. when the tailer goes idle.
+    """
+
+    def __init__(self, path: str, interval: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._last_save = 0.0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._state = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._state.get(key)
+
+    def update(self, key: str, path: str, reader: "LogReader") -> None:
+        """Record ``reader``'s position; saves if the interval has elapsed."""
+        dev, ino = reader.identity()
+        self._state[key] = {
+            "path": path,
+            "dev": dev,
+            "ino": ino,
+            "offset": reader.offset,
+            "line_len": len(reader.last_line),
+            "line_sha1": hashlib.sha1(reader.last_line).hexdigest(),
+        }
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._dirty:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    @staticmethod
+    def matches(cp: Dict[str, Any], reader: "LogReader") -> bool:
+        """True if ``reader`` is the checkpointed file, intact up to its offset."""
+        if list(reader.identity()) != [cp.get("dev"), cp.get("ino")]:
+            return False
+        offset, n = int(cp.get("offset", 0)), int(cp.get("line_len", 0))
+        if reader.size() < offset or n > offset:
+            return False
+        return hashlib.sha1(reader.read_at(offset - n, n)).hexdigest() == cp.get("line_sha1")
+
+
+class PollWatcher:
+    """Fallback change watcher: every wait() simply sleeps one poll interval."""
+
+    event_driven = False
+
+    def __init__(self, poll_secs: float = TAIL_POLL_SECS):
+        self.timeout = poll_secs
+
+    def add(self, path: str) -> None:
+        pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        time.sleep(self.timeout if timeout is None else timeout)
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux change watcher: inotify on the directories of the tailed files.
+
+    Watching the directory (not the file) also reports new files, so daily
+    rollover is noticed as soon as the next log is created.
+    """
+
+    event_driven = True
+    _IN_NONBLOCK = 0o4000
+    _IN_CLOEXEC = 0o2000000
+    # MODIFY | CLOSE_WRITE | MOVED_FROM | MOVED_TO | CREATE | DELETE
+    _MASK = 0x002 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+
+    def __init__(self, timeout: float = TAIL_WATCH_TIMEOUT_SECS):
+        if ctypes is None or not sys.platform.startswith('linux'):
+            raise OSError("inotify unavailable")
+        self.timeout = timeout
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[str, int] = {}
+
+    def add(self, path: str) -> None:
+        d = os.path.dirname(os.path.abspath(path))
+        if d in self._dirs:
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(d), self._MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {d}")
+        self._dirs[d] = wd
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        ready, _, _ = select.select([self._fd], [], [], self.timeout if timeout is None else timeout)
+        if not ready:
+            return False
+        # Drain all queued events; callers re-check the files themselves
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class Win32Watcher:
+    """Windows change watcher: FindFirstChangeNotificationW per directory.
+
+    NTFS may defer size/last-write notifications for a file the writer keeps
+    open, so the safety re-check never waits longer than TAIL_POLL_SECS: a
+    deferred notification costs no more latency than plain polling would.
+    """
+
+    event_driven = True
+    # FILE_NOTIFY_CHANGE_FILE_NAME | SIZE | LAST_WRITE
+    _FILTER = 0x001 | 0x008 | 0x010
+    _WAIT_OBJECT_0 = 0
+    _WAIT_TIMEOUT = 0x102
+
+    def __init__(self, timeout: float = min(TAIL_WATCH_TIMEOUT_SECS, TAIL_POLL_SECS)):
+        if ctypes is None or os.name != 'nt':
+            raise OSError("change notifications unavailable")
+        self.timeout = timeout
+        k32 = ctypes.windll.kernel32
+        k32.FindFirstChangeNotificationW.argtypes = [ctypes.c_wchar_p, ctypes.c_int, ctypes.c_uint32]
+        k32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        k32.FindNextChangeNotification.argtypes = [ctypes.c_void_p]
+        k32.FindCloseChangeNotification.argtypes = [ctypes.c_void_p]
+        k32.WaitForMultipleObjects.argtypes = [ctypes.c_uint32, ctypes.c_void_p, ctypes.c_int, ctypes.c_uint32]
+        k32.WaitForMultipleObjects.restype = ctypes.c_uint32
+        self._k32 = k32
+        self._handles: Dict[str, int] = {}
+
+    def add(self, path: str) -> None:
+        d = os.path.dirname(os.path.abspath(path))
+        if d in self._handles:
+            return
+        h = self._k32.FindFirstChangeNotificationW(d, False, self._FILTER)
+        if h is None or h == ctypes.c_void_p(-1).value:
+            raise OSError(f"FindFirstChangeNotificationW failed for {d}")
+        self._handles[d] = h
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        timeout = self.timeout if timeout is None else timeout
+        handles = list(self._handles.values())
+        if not handles:
+            time.sleep(timeout)
+            return False
+        arr = (ctypes.c_void_p * len(handles))(*handles)
+        rc = self._k32.WaitForMultipleObjects(len(handles), arr, False, int(timeout * 1000))
+        if rc == self._WAIT_TIMEOUT or rc >= self._WAIT_OBJECT_0 + len(handles):
+            return False
+        self._k32.FindNextChangeNotification(handles[rc - self._WAIT_OBJECT_0])
+        return True
+
+    def close(self) -> None:
+        for h in self._handles.values():
+            self._k32.FindCloseChangeNotification(h)
+        self._handles.clear()
+
+
+def make_watcher(paths: Iterable[str] = ()):
+    """Return the best available change watcher for ``paths`` (FX_TAIL_WATCH).
+
+    Event backends fall back to PollWatcher if they cannot be set up.
+    """
+    backends = {'inotify': [InotifyWatcher], 'win32': [Win32Watcher], 'poll': []}
+    candidates = backends.get(TAIL_WATCH, [InotifyWatcher, Win32Watcher])
+    for cls in candidates:
+        try:
+            watcher = cls()
+        except OSError:
+            continue
+        try:
+            for p in paths:
+                watcher.add(p)
+        except OSError:
+            watcher.close()
+            continue
+        return watcher
+    return PollWatcher()
+
+
 def follow_utf16(path: str, from_beginning: bool = False):
     """Generator yielding decoded lines as they are appended to a UTF-16 log.
 
-    Handles basic truncation and rotation by watching inode and size.
+    Handles basic truncation and rotation by watching inode and size. Waits
+    for appends with a change watcher (inotify/Win32) when available, and
+    sleep-polls otherwise.
     """
     last_stat = None
-    text = None
+    watcher = make_watcher([path])
 
-    def open_text():
-        # Use shared read on Windows to avoid writer locks
-        return _open_shared_text(path)
-
-    raw, text = open_text()
+    # Use shared read on Windows to avoid writer locks
+    reader = open_log_reader(path, from_beginning)
     try:
-        if not from_beginning:
-            # Fast-forward to end
-            text.seek(0, os.SEEK_END)
-
         while True:
             # Read any available new lines
             try:
-                line = text.readline()
+                lines = reader.read_lines()
             except Exception:
                 # If reading fails due to rotation/locking, reopen
-                try:
-                    text.detach()
-                except Exception:
-                    pass
-                try:
-                    raw.close()
-                except Exception:
-                    pass
-                time.sleep(0.2)
-                raw, text = open_text()
-                if not from_beginning:
-                    text.seek(0, os.SEEK_END)
+                reader.close()
+                time.sleep(TAIL_POLL_SECS)
+                reader = open_log_reader(path, from_beginning)
                 last_stat = None
                 continue
-            if line:
-                yield line.rstrip("\r\n")
+            if lines:
+                yield from lines
                 continue
 
             # No new data; check for rotation/truncation
@@ -224,56 +605,104 @@ def follow_utf16(path: str, from_beginning: bool = False):
                 st = None
 
             # If file changed or truncated, reopen
-            try:
-                pos = text.tell()
-            except Exception:
-                pos = None
-
             if st is None or (last_stat and st.st_ino != last_stat.st_ino) or (
-                last_stat and st.st_size < (pos or 0)
+                last_stat and st.st_size < reader.offset
             ):
-                try:
-                    text.detach()
-                except Exception:
-                    pass
-                try:
-                    raw.close()
-                except Exception:
-                    pass
-                time.sleep(0.2)
-                raw, text = open_text()
-                if not from_beginning:
-                    text.seek(0, os.SEEK_END)
+                reader.close()
+                time.sleep(TAIL_POLL_SECS)
+                reader = open_log_reader(path, from_beginning)
                 last_stat = st
                 continue
 
             last_stat = st
-            time.sleep(0.2)
+            watcher.wait()
     finally:
-        try:
-            text.detach()
-        except Exception:
-            pass
-        try:
-            raw.close()
-        except Exception:
-            pass
+        watcher.close()
+        reader.close()
 
 
 def iter_file_once(path: str) -> Iterable[str]:
-    with open(path, 'rb') as raw:
-        text = io.TextIOWrapper(raw, encoding='utf-16-le')
-        for line in text:
-            yield line.rstrip('\r\n')
+    reader = LogReader(open(path, 'rb', buffering=0), LOG_ENCODING)
+    try:
+        while True:
+            lines = reader.read_lines()
+            if lines:
+                yield from lines
+            elif reader.offset + reader.pending_bytes() >= reader.size():
+                break
+        tail = reader.read_partial()
+        if tail:
+            yield tail
+    finally:
+        reader.close()
+
+
+DAILY_LOG_RE = re.compile(r"^\d{8}\.log$")
+
+
+def resolve_backfill_files(target: str) -> List[str]:
+    """Expand a directory (its YYYYMMDD.log files) or a glob into a sorted list."""
+    if os.path.isdir(target):
+        paths = [os.path.join(target, n) for n in os.listdir(target) if DAILY_LOG_RE.match(n)]
+    else:
+        paths = glob.glob(target)
+    return sorted(paths, key=lambda p: (os.path.basename(p), p))
+
+
+def scan_file(path: str, sym_filter: Optional[Set[str]] = None) -> List[str]:
+    """Parse one whole log and return its signals as ndjson lines (worker task).
+
+    Each signal is tagged with its source ``file`` name and 1-based ``line``.
+    """
+    out = []
+    name = os.path.basename(path)
+    for lineno, raw_line in enumerate(iter_file_once(path), 1):
+        sig = parse_signal(raw_line.split("\t"))
+        if not sig:
+            continue
+        if sym_filter and sig.get("symbol") not in sym_filter:
+            continue
+        sig["file"] = name
+        sig["line"] = lineno
+        out.append(json.dumps(sig, ensure_ascii=False))
+    return out
+
+
+def backfill(paths: List[str], sym_filter: Optional[Set[str]], jobs: int,
+             out_fp: Optional[io.TextIOBase]) -> None:
+    """Scan ``paths`` in a process pool, emitting results in file/line order."""
+    if jobs == 1 or len(paths) <= 1:
+        results: Iterable[List[str]] = (scan_file(p, sym_filter) for p in paths)
+        _emit_lines(results, out_fp)
+        return
+    with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+        # map() yields in submission order, so output stays sorted by file
+        _emit_lines(pool.map(scan_file, paths, [sym_filter] * len(paths)), out_fp)
+
+
+def _emit_lines(results: Iterable[List[str]], out_fp: Optional[io.TextIOBase]) -> None:
+    for lines in results:
+        if not lines:
+            continue
+        block = "\n".join(lines) + "\n"
+        sys.stdout.write(block)
+        sys.stdout.flush()
+        if out_fp is not None:
+            out_fp.write(block)
+            out_fp.flush()
 
 
 def main():
     ap = argparse.ArgumentParser(description="Monitor MT5 UTF-16 logs and extract Buy/Sell signals as JSON.")
-    ap.add_argument("file", help="Path to the UTF-16 log file (e.g., 20250906.log)")
+    ap.add_argument("file", help="Path to the UTF-16 log file (e.g., 20250906.log); "
+                                 "with --backfill, a directory or glob of YYYYMMDD.log files")
     ap.add_argument("--from-beginning", action="store_true", help="Process existing content before tailing")
     ap.add_argument("--out", default=None, help="Optional path to append JSON Lines (ndjson)")
     ap.add_argument("--symbols", default=None, help="Comma-separated symbol filter (e.g., BTCUSD,ETHUSD)")
     ap.add_argument("--once", action="store_true", help="Process existing content only and exit")
+    ap.add_argument("--backfill", action="store_true",
+                    help="Parse many whole files in parallel and exit (adds file/line to each signal)")
+    ap.add_argument("--jobs", type=int, default=0, help="Backfill worker processes (default: CPU count)")
     args = ap.parse_args()
 
     sym_filter = None
@@ -282,6 +711,14 @@ def main():
 
     out_fp = open(args.out, "a", encoding="utf-8") if args.out else None
     try:
+        if args.backfill:
+            paths = resolve_backfill_files(args.file)
+            if not paths:
+                print(f"No log files match {args.file}", file=sys.stderr)
+                return
+            backfill(paths, sym_filter, args.jobs, out_fp)
+            return
+
         line_iter: Iterable[str]
         if args.once:
             line_iter = iter_file_once(args.file)